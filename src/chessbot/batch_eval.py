@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        "batch_eval needs numpy, install with: pip install chessbot[numpy]"
+    ) from e
+
+from .board import BLACK, PAWN, ROOK, WHITE, Board, make_piece_idx
+from .eval import MAX_PHASE
+from .pst import PHASE_BY_CODE, PST_EG, PST_MG
+
+# Same eval as eval.evaluate() but over many positions at once, for offline
+# analysis / tuning. Positions are rows of piece codes (color|type, 0 = empty),
+# 64 per row with a1 = 0, b1 = 1, ... h8 = 63. Rows of 128 in 0x88 order are
+# fine too.
+
+# the on-board 0x88 squares in a1..h8 order
+_SQ_0X88 = np.array([(r << 4) | f for r in range(8) for f in range(8)])
+
+# per piece code tables over the 64 squares
+_PST_MG = np.array(PST_MG, dtype=np.int64)[:, _SQ_0X88]
+_PST_EG = np.array(PST_EG, dtype=np.int64)[:, _SQ_0X88]
+_PHASE = np.array(PHASE_BY_CODE, dtype=np.int64)
+
+# pawn advance, as in eval._pawn_structure
+_PAWN_SCORE = np.zeros((16, 64), dtype=np.int64)
+_ranks = np.arange(64) >> 3
+_PAWN_SCORE[make_piece_idx(WHITE, PAWN)] = _ranks * 3
+_PAWN_SCORE[make_piece_idx(BLACK, PAWN)] = -(7 - _ranks) * 3
+
+_WP = make_piece_idx(WHITE, PAWN)
+_BP = make_piece_idx(BLACK, PAWN)
+_WR = make_piece_idx(WHITE, ROOK)
+_BR = make_piece_idx(BLACK, ROOK)
+
+
+def pack_boards(boards: Sequence[Board]) -> np.ndarray:
+    """N x 64 int8 array of piece codes for evaluate_batch."""
+    out = np.empty((len(boards), 64), dtype=np.int8)
+    for i, b in enumerate(boards):
+        out[i] = np.array(b.squares, dtype=np.int8)[_SQ_0X88]
+    return out
+
+
+def evaluate_batch(codes: np.ndarray) -> np.ndarray:
+    """Scores for every row, White's POV, equal to evaluate() on each position."""
+    codes = np.asarray(codes)
+    if codes.ndim != 2 or codes.shape[1] not in (64, 128):
+        raise ValueError(f"expected N x 64 or N x 128 piece codes, got {codes.shape}")
+    if codes.shape[1] == 128:
+        codes = codes[:, _SQ_0X88]
+    codes = codes.astype(np.intp)
+    sq = np.arange(64)
+
+    # material + piece-square, tapered like Board.psqt_* / eval.taper
+    mg = _PST_MG[codes, sq].sum(axis=1)
+    eg = _PST_EG[codes, sq].sum(axis=1)
+    phase = np.minimum(_PHASE[codes].sum(axis=1), MAX_PHASE)
+    score = (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
+
+    score += _PAWN_SCORE[codes, sq].sum(axis=1)
+
+    # rooks on open / semi-open files, counted per file
+    grid = codes.reshape(-1, 8, 8)  # N x rank x file
+    w_pawns = (grid == _WP).any(axis=1)
+    b_pawns = (grid == _BP).any(axis=1)
+    w_rooks = (grid == _WR).sum(axis=1)
+    b_rooks = (grid == _BR).sum(axis=1)
+    open_file = ~(w_pawns | b_pawns)
+    w_bonus = np.where(open_file, 12, np.where(~w_pawns, 6, 0))
+    b_bonus = np.where(open_file, 12, np.where(~b_pawns, 6, 0))
+    score += (w_rooks * w_bonus - b_rooks * b_bonus).sum(axis=1)
+    return score
@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+from array import array
+from typing import List
+
+from .board import (
+    BISHOP,
+    BLACK_OO,
+    BLACK_OOO,
+    KING,
+    KNIGHT,
+    PAWN,
+    QUEEN,
+    ROOK,
+    UNDO_STRIDE,
+    WHITE,
+    WHITE_OO,
+    WHITE_OOO,
+    Board,
+    _U_CAPTURED,
+    _U_CAPTURED_SQUARE,
+    _U_FRM,
+    _U_MOVED,
+    _U_ROOK_FROM,
+    _U_ROOK_TO,
+    _U_TO,
+    make_piece_idx,
+    on_board,
+    piece_color,
+)
+from .move import (
+    FLAG_CASTLE,
+    FLAG_DOUBLE_PAWN,
+    FLAG_EN_PASSANT,
+    FLAG_PROMOTION,
+    FLAGS_SHIFT,
+    PROMO_SHIFT,
+)
+
+# Bitboard backend: one 64 bit int per piece code plus occupancy per color,
+# square n = rank * 8 + file (a1 = 0, h8 = 63). Attack sets come from tables,
+# sliders from precomputed rays cut at the first blocker.
+#
+# BitBoard keeps everything Board has (squares, piece lists, hashes, eval
+# totals) so eval, SEE and the engine work unchanged. Moves are still packed
+# with 0x88 squares, same ints the 0x88 generator makes.
+
+FULL = (1 << 64) - 1
+
+TO_0X88 = [((s >> 3) << 4) | (s & 7) for s in range(64)]
+TO_64 = [((i >> 4) << 3) | (i & 7) if on_board(i) else -1 for i in range(128)]
+
+
+def _leaper_table(deltas: tuple[tuple[int, int], ...]) -> List[int]:
+    table = []
+    for s in range(64):
+        f, r = s & 7, s >> 3
+        bb = 0
+        for df, dr in deltas:
+            if 0 <= f + df < 8 and 0 <= r + dr < 8:
+                bb |= 1 << ((r + dr) * 8 + f + df)
+        table.append(bb)
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_table(
+    ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+)
+KING_ATTACKS = _leaper_table(
+    ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+)
+# squares a pawn of that color on s attacks
+PAWN_ATTACKS = [_leaper_table(((-1, 1), (1, 1))), _leaper_table(((-1, -1), (1, -1)))]
+
+# rays by direction. the first four go up the board (first blocker is the
+# lowest set bit), the last four go down (highest set bit)
+_DIRS = ((0, 1), (1, 0), (1, 1), (-1, 1), (0, -1), (-1, 0), (-1, -1), (1, -1))
+_ROOK_DIRS = (0, 1, 4, 5)
+_BISHOP_DIRS = (2, 3, 6, 7)
+
+
+def _ray(s: int, df: int, dr: int) -> int:
+    f, r = (s & 7) + df, (s >> 3) + dr
+    bb = 0
+    while 0 <= f < 8 and 0 <= r < 8:
+        bb |= 1 << (r * 8 + f)
+        f += df
+        r += dr
+    return bb
+
+
+RAYS = [[_ray(s, df, dr) for s in range(64)] for df, dr in _DIRS]
+_ROOK_UP = [RAYS[d] for d in _ROOK_DIRS if d < 4]
+_ROOK_DOWN = [RAYS[d] for d in _ROOK_DIRS if d >= 4]
+_BISHOP_UP = [RAYS[d] for d in _BISHOP_DIRS if d < 4]
+_BISHOP_DOWN = [RAYS[d] for d in _BISHOP_DIRS if d >= 4]
+ROOK_RAYS = [RAYS[0][s] | RAYS[1][s] | RAYS[4][s] | RAYS[5][s] for s in range(64)]
+BISHOP_RAYS = [RAYS[2][s] | RAYS[3][s] | RAYS[6][s] | RAYS[7][s] for s in range(64)]
+
+# squares strictly between two aligned squares, 0 if not on a line
+BETWEEN = [[0] * 64 for _ in range(64)]
+for _a in range(64):
+    for _d in range(8):
+        _ray_bb = RAYS[_d][_a]
+        _bb = 0
+        while _ray_bb:
+            _b = (_ray_bb & -_ray_bb).bit_length() - 1 if _d < 4 else _ray_bb.bit_length() - 1
+            BETWEEN[_a][_b] = _bb
+            _bb |= 1 << _b
+            _ray_bb ^= 1 << _b
+
+
+def rook_attacks(s: int, occ: int) -> int:
+    att = 0
+    for ray in _ROOK_UP:
+        r = ray[s]
+        b = r & occ
+        if b:
+            r ^= ray[(b & -b).bit_length() - 1]
+        att |= r
+    for ray in _ROOK_DOWN:
+        r = ray[s]
+        b = r & occ
+        if b:
+            r ^= ray[b.bit_length() - 1]
+        att |= r
+    return att
+
+
+def bishop_attacks(s: int, occ: int) -> int:
+    att = 0
+    for ray in _BISHOP_UP:
+        r = ray[s]
+        b = r & occ
+        if b:
+            r ^= ray[(b & -b).bit_length() - 1]
+        att |= r
+    for ray in _BISHOP_DOWN:
+        r = ray[s]
+        b = r & occ
+        if b:
+            r ^= ray[b.bit_length() - 1]
+        att |= r
+    return att
+
+
+class BitBoard(Board):
+    """Board that also keeps bitboards, in step with make/unmake."""
+
+    def _index_pieces(self) -> None:
+        super()._index_pieces()
+        # indexed by piece code like ZOBRIST_PIECE
+        self.pieces: List[int] = [0] * 16
+        self.occupied: List[int] = [0, 0]
+        for idx in range(128):
+            p = self.squares[idx] if on_board(idx) else 0
+            if p:
+                bit = 1 << TO_64[idx]
+                self.pieces[p] |= bit
+                self.occupied[piece_color(p)] |= bit
+
+    def copy(self) -> "BitBoard":
+        b = super().copy()
+        b.pieces = self.pieces.copy()
+        b.occupied = self.occupied.copy()
+        return b
+
+    def _make(self, frm: int, to: int, promo_type: int) -> None:
+        super()._make(frm, to, promo_type)
+        self._toggle(self._undo_top - UNDO_STRIDE)
+
+    def unmake(self) -> None:
+        # squares still hold the position after the move, which _toggle reads
+        top = self._undo_top - UNDO_STRIDE
+        if self._undo[top + _U_FRM] != -1:  # null moves leave the bits alone
+            self._toggle(top)
+        super().unmake()
+
+    def _toggle(self, top: int) -> None:
+        """Flip the bits the move at undo record top changed. Same call undoes it."""
+        u = self._undo
+        squares = self.squares
+        pieces = self.pieces
+        occupied = self.occupied
+        frm = u[top + _U_FRM]
+        to = u[top + _U_TO]
+        moved = u[top + _U_MOVED]
+        side = piece_color(moved)
+        frm_bit = 1 << TO_64[frm]
+        to_bit = 1 << TO_64[to]
+        pieces[moved] ^= frm_bit
+        pieces[squares[to]] ^= to_bit
+        occupied[side] ^= frm_bit | to_bit
+
+        captured = u[top + _U_CAPTURED]
+        if captured:
+            cap_sq = u[top + _U_CAPTURED_SQUARE]
+            cap_bit = 1 << TO_64[cap_sq if cap_sq != -1 else to]
+            pieces[captured] ^= cap_bit
+            occupied[side ^ 1] ^= cap_bit
+
+        rook_from = u[top + _U_ROOK_FROM]
+        if rook_from != -1:
+            rook_bits = (1 << TO_64[rook_from]) | (1 << TO_64[u[top + _U_ROOK_TO]])
+            pieces[make_piece_idx(side, ROOK)] ^= rook_bits
+            occupied[side] ^= rook_bits
+
+
+def attackers(board: BitBoard, s: int, by_color: int, occ: int) -> int:
+    """Bitboard of by_color pieces attacking square s, sliders seeing through
+    anything not in occ."""
+    P = board.pieces
+    c = by_color << 3
+    queens = P[c | QUEEN]
+    return (
+        (PAWN_ATTACKS[by_color ^ 1][s] & P[c | PAWN])
+        | (KNIGHT_ATTACKS[s] & P[c | KNIGHT])
+        | (KING_ATTACKS[s] & P[c | KING])
+        | (rook_attacks(s, occ) & (P[c | ROOK] | queens))
+        | (bishop_attacks(s, occ) & (P[c | BISHOP] | queens))
+    )
+
+
+def in_check(board: BitBoard, color: int) -> bool:
+    k = TO_64[board.king_sq[color]]
+    return attackers(board, k, color ^ 1, board.occupied[0] | board.occupied[1]) != 0
+
+
+def generate_legal_packed(board: BitBoard) -> array:
+    return _generate(board, captures_only=False)
+
+
+def generate_captures_packed(board: BitBoard) -> array:
+    return _generate(board, captures_only=True)
+
+
+_PROMO_FLAGS = FLAG_PROMOTION << FLAGS_SHIFT
+_EP_FLAGS = FLAG_EN_PASSANT << FLAGS_SHIFT
+_DOUBLE_FLAGS = FLAG_DOUBLE_PAWN << FLAGS_SHIFT
+_CASTLE_FLAGS = FLAG_CASTLE << FLAGS_SHIFT
+_RANK_1 = 0xFF
+_RANK_8 = 0xFF << 56
+
+
+def _generate(board: BitBoard, *, captures_only: bool) -> array:
+    """Same moves as movegen._generate_legal: check mask from the checkers, pin
+    rays from the sliders x-raying the king, attack tests only for the king
+    and en passant."""
+    out = array("I")
+    side = board.side_to_move
+    opp = side ^ 1
+    P = board.pieces
+    own = board.occupied[side]
+    enemy = board.occupied[opp]
+    occ = own | enemy
+    ksq = board.king_sq[side]
+    k = TO_64[ksq]
+
+    checkers = attackers(board, k, opp, occ)
+    n_checks = checkers.bit_count()
+
+    # king, tested with itself lifted so sliders see through its square
+    targets = KING_ATTACKS[k] & (enemy if captures_only else ~own)
+    occ_no_king = occ ^ (1 << k)
+    while targets:
+        bit = targets & -targets
+        targets ^= bit
+        t = bit.bit_length() - 1
+        if not attackers(board, t, opp, occ_no_king):
+            out.append(ksq | (TO_0X88[t] << 7))
+    if n_checks > 1:
+        return out
+
+    if n_checks == 1:
+        c = checkers.bit_length() - 1
+        check_mask = BETWEEN[k][c] | checkers
+    else:
+        check_mask = FULL
+        if not captures_only and board.castling_rights:
+            _castles(board, side, occ, out)
+
+    # pinned pieces -> the ray they may still move along
+    o = opp << 3
+    snipers = (ROOK_RAYS[k] & (P[o | ROOK] | P[o | QUEEN])) | (
+        BISHOP_RAYS[k] & (P[o | BISHOP] | P[o | QUEEN])
+    )
+    pins = {}
+    while snipers:
+        bit = snipers & -snipers
+        snipers ^= bit
+        s = bit.bit_length() - 1
+        between = BETWEEN[k][s] & occ
+        if between and between & (between - 1) == 0 and between & own:
+            pins[between.bit_length() - 1] = BETWEEN[k][s] | bit
+
+    targets_mask = (enemy if captures_only else ~own) & check_mask
+    c = side << 3
+    for ptype, attack in (
+        (KNIGHT, None),
+        (BISHOP, bishop_attacks),
+        (ROOK, rook_attacks),
+        (QUEEN, None),
+    ):
+        bb = P[c | ptype]
+        while bb:
+            bit = bb & -bb
+            bb ^= bit
+            f = bit.bit_length() - 1
+            if ptype == KNIGHT:
+                targets = KNIGHT_ATTACKS[f]
+            elif ptype == QUEEN:
+                targets = rook_attacks(f, occ) | bishop_attacks(f, occ)
+            else:
+                targets = attack(f, occ)
+            targets &= targets_mask
+            if f in pins:
+                targets &= pins[f]
+            frm = TO_0X88[f]
+            while targets:
+                t = targets & -targets
+                targets ^= t
+                out.append(frm | (TO_0X88[t.bit_length() - 1] << 7))
+
+    _pawn_moves(board, side, own, enemy, check_mask, pins, captures_only, out)
+    return out
+
+
+def _pawn_moves(
+    board: BitBoard,
+    side: int,
+    own: int,
+    enemy: int,
+    check_mask: int,
+    pins: dict[int, int],
+    captures_only: bool,
+    out: array,
+) -> None:
+    occ = own | enemy
+    empty = ~occ & FULL
+    up = 8 if side == WHITE else -8
+    start_rank = 0xFF << 8 if side == WHITE else 0xFF << 48
+    last_rank = _RANK_8 if side == WHITE else _RANK_1
+    ep = board.ep_square
+    ep_bit = 1 << TO_64[ep] if ep != -1 else 0
+
+    bb = board.pieces[(side << 3) | PAWN]
+    while bb:
+        bit = bb & -bb
+        bb ^= bit
+        f = bit.bit_length() - 1
+        allowed = check_mask & pins.get(f, FULL)
+        frm = TO_0X88[f]
+
+        caps = PAWN_ATTACKS[side][f] & enemy & allowed
+        one = 1 << (f + up)
+        if one & empty:
+            if one & last_rank:
+                caps |= one & allowed
+            elif not captures_only:
+                if one & allowed:
+                    out.append(frm | (TO_0X88[f + up] << 7))
+                if bit & start_rank:
+                    two = f + 2 * up
+                    if (1 << two) & empty & allowed:
+                        out.append(frm | (TO_0X88[two] << 7) | _DOUBLE_FLAGS)
+
+        while caps:
+            t = caps & -caps
+            caps ^= t
+            base = frm | (TO_0X88[t.bit_length() - 1] << 7)
+            if t & last_rank:
+                for promo in (QUEEN, ROOK, BISHOP, KNIGHT):
+                    out.append(base | (promo << PROMO_SHIFT) | _PROMO_FLAGS)
+            else:
+                out.append(base)
+
+        if ep_bit & PAWN_ATTACKS[side][f]:
+            # removes two pieces from the board at once, so test it for real
+            cap = TO_64[ep] - up
+            occ_after = (occ ^ bit ^ (1 << cap)) | ep_bit
+            k = TO_64[board.king_sq[side]]
+            board.pieces[((side ^ 1) << 3) | PAWN] ^= 1 << cap
+            safe = not attackers(board, k, side ^ 1, occ_after)
+            board.pieces[((side ^ 1) << 3) | PAWN] ^= 1 << cap
+            if safe:
+                out.append(frm | (ep << 7) | _EP_FLAGS)
+
+
+# (right, king from, king to, squares that must be empty, square the king crosses)
+_CASTLES = (
+    (WHITE_OO, 4, 6, (1 << 5) | (1 << 6), 5),
+    (WHITE_OOO, 4, 2, (1 << 1) | (1 << 2) | (1 << 3), 3),
+    (BLACK_OO, 60, 62, (1 << 61) | (1 << 62), 61),
+    (BLACK_OOO, 60, 58, (1 << 57) | (1 << 58) | (1 << 59), 59),
+)
+
+
+def _castles(board: BitBoard, side: int, occ: int, out: array) -> None:
+    """Castling when not in check: path clear, crossing and landing squares safe."""
+    rights = board.castling_rights
+    opp = side ^ 1
+    for right, k_from, k_to, path, cross in _CASTLES[side * 2 : side * 2 + 2]:
+        if not rights & right or path & occ:
+            continue
+        if TO_0X88[k_from] != board.king_sq[side]:
+            continue
+        if attackers(board, cross, opp, occ) or attackers(board, k_to, opp, occ):
+            continue
+        out.append(TO_0X88[k_from] | (TO_0X88[k_to] << 7) | _CASTLE_FLAGS)
@@ -1,19 +1,26 @@
 from __future__ import annotations
 
+import random
+import struct
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
-WHITE = 0
-BLACK = 1
-
-# (low 3 bits)
-EMPTY = 0
-PAWN = 1
-KNIGHT = 2
-BISHOP = 3
-ROOK = 4
-QUEEN = 5
-KING = 6
+from .pieces import (
+    BISHOP,
+    BLACK,
+    EMPTY,
+    KING,
+    KNIGHT,
+    PAWN,
+    QUEEN,
+    ROOK,
+    WHITE,
+    make_piece_idx,
+    on_board,
+    piece_color,
+    piece_type,
+)
+from .pst import PHASE_BY_CODE, PST_EG, PST_MG
 
 # Castling rights mask bits
 WHITE_OO = 1 << 0
@@ -25,10 +32,6 @@ PROMO_MAP = {"q": 5, "r": 4, "b": 3, "n": 2}
 PROMO_LETTER = {v: k for k, v in PROMO_MAP.items()}
 
 
-def on_board(idx: int) -> bool:
-    return (idx & 0x88) == 0
-
-
 def rf_to_idx(file: int, rank: int) -> int:
     return (rank << 4) | file
 
@@ -52,18 +55,6 @@ def promo_suffix(ptype: int) -> str:
     return PROMO_LETTER.get(ptype, "")
 
 
-def make_piece_idx(color: int, ptype: int) -> int:
-    return (color << 3) | ptype
-
-
-def piece_type(piece: int) -> int:
-    return piece & 0b111
-
-
-def piece_color(piece: int) -> int:
-    return (piece >> 3) & 1
-
-
 PIECE_CHARS = {
     make_piece_idx(WHITE, PAWN): "P",
     make_piece_idx(WHITE, KNIGHT): "N",
@@ -82,6 +73,39 @@ PIECE_CHARS = {
 
 START_BACK_RANK = [ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK]
 
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+_FEN_PIECES = {ch: p for p, ch in PIECE_CHARS.items() if p != EMPTY}
+_FEN_CASTLING = (("K", WHITE_OO), ("Q", WHITE_OOO), ("k", BLACK_OO), ("q", BLACK_OOO))
+# castling bit, (king square, king), (rook square, rook)
+_CASTLING_HOMES = tuple(
+    (
+        bit,
+        (rf_to_idx(4, rank), make_piece_idx(color, KING)),
+        (rf_to_idx(rook_file, rank), make_piece_idx(color, ROOK)),
+    )
+    for bit, color, rank, rook_file in (
+        (WHITE_OO, WHITE, 0, 7),
+        (WHITE_OOO, WHITE, 0, 0),
+        (BLACK_OO, BLACK, 7, 7),
+        (BLACK_OOO, BLACK, 7, 0),
+    )
+)
+
+# Zobrist keys. fixed seed so keys (and anything cached by them) are stable between runs
+_zobrist_rng = random.Random(0x5EED_C0DE)
+
+
+def _rand64() -> int:
+    return _zobrist_rng.getrandbits(64)
+
+
+# indexed [piece][square], piece is the 4 bit color|type code, square is 0x88
+ZOBRIST_PIECE: List[List[int]] = [[_rand64() for _ in range(128)] for _ in range(16)]
+ZOBRIST_SIDE = _rand64()
+# one key per full castling rights mask, so updating is a single xor out/in
+ZOBRIST_CASTLING: List[int] = [_rand64() for _ in range(16)]
+ZOBRIST_EP_FILE: List[int] = [_rand64() for _ in range(8)]
+
 
 # practice with immutable type here, so i can fuck up less, but the logic got annoying so i fucked up more. maybe revert
 @dataclass(frozen=True, slots=True)
@@ -101,6 +125,41 @@ class UndoSnapshot:
     rook_from: int = -1
     rook_to: int = -1
 
+    zobrist: int = 0
+
+    psqt_mg: int = 0
+    psqt_eg: int = 0
+    phase: int = 0
+
+    pawn_key: int = 0
+
+
+# Board.make/unmake keep the same fields as UndoSnapshot in a flat int list,
+# one UNDO_STRIDE sized record per ply, instead of allocating a snapshot per move
+UNDO_STRIDE = 16
+(
+    _U_FRM,
+    _U_TO,
+    _U_MOVED,
+    _U_CAPTURED,
+    _U_EP,
+    _U_CASTLING,
+    _U_HALFMOVE,
+    _U_FULLMOVE,
+    _U_CAPTURED_SQUARE,
+    _U_ROOK_FROM,
+    _U_ROOK_TO,
+    _U_ZOBRIST,
+    _U_PSQT_MG,
+    _U_PSQT_EG,
+    _U_PHASE,
+    _U_PAWN_KEY,
+) = range(UNDO_STRIDE)
+# see Board.to_bytes
+_BOARD_STRUCT = struct.Struct("<64sBBBHH")
+
+UNDO_STACK_PLIES = 256  # starting size, grows if a line goes deeper
+
 
 class Board:
     def __init__(self) -> None:
@@ -112,6 +171,23 @@ class Board:
         self.ep_square: int = -1
         self.halfmove_clock: int = 0
         self.fullmove_number: int = 1
+        # 64 bit position key, kept up to date by make_move / undo_move
+        self.zobrist: int = 0
+        # same but only over pawns, for the pawn structure cache in eval
+        self.pawn_key: int = 0
+        # where each side's pieces are, so nothing has to scan all 128 squares
+        self.king_sq: List[int] = [-1, -1]
+        self.piece_squares: List[set[int]] = [set(), set()]
+        # running piece-square totals (material included) and game phase,
+        # see pst.py. evaluate() reads these instead of rescanning the board
+        self.psqt_mg: int = 0
+        self.psqt_eg: int = 0
+        self.phase: int = 0
+        # optional nnue.Accumulator, told about every make/unmake
+        self.accumulator = None
+        # undo records for make/unmake, _undo_top is the next free slot (in ints)
+        self._undo: List[int] = [0] * (UNDO_STACK_PLIES * UNDO_STRIDE)
+        self._undo_top: int = 0
         self.reset()
 
     def reset(self) -> None:
@@ -128,15 +204,199 @@ class Board:
         self.ep_square = -1
         self.halfmove_clock = 0
         self.fullmove_number = 1
+        self._setup()
+
+    def _setup(self) -> None:
+        """Rebuild everything derived from squares and the state fields, and
+        forget the undo stack. For after setting up a position by hand."""
+        self.zobrist = self.compute_zobrist()
+        self.pawn_key = self.compute_pawn_key()
+        self._index_pieces()
+        self.psqt_mg, self.psqt_eg, self.phase = self.compute_psqt()
+        self._undo_top = 0
+        if self.accumulator is not None:
+            self.accumulator.refresh(self)
+
+    def to_bytes(self) -> bytes:
+        """Compact form for sending to other processes: 64 piece codes (a1..h8)
+        then side, castling, ep square (0xFF = none), halfmove, fullmove."""
+        return _BOARD_STRUCT.pack(
+            bytes(self.squares[(r << 4) | f] for r in range(8) for f in range(8)),
+            self.side_to_move,
+            self.castling_rights,
+            self.ep_square & 0xFF,
+            self.halfmove_clock,
+            self.fullmove_number,
+        )
+
+    @classmethod
+    def from_fen(cls, fen: str) -> "Board":
+        """Board from a FEN string. Move counters may be left off."""
+        parts = fen.split()
+        if len(parts) not in (4, 6):
+            raise ValueError(f"bad FEN (need 4 or 6 fields): {fen!r}")
+        rows = parts[0].split("/")
+        if len(rows) != 8:
+            raise ValueError(f"bad FEN (need 8 ranks): {fen!r}")
+
+        b = cls()
+        b.squares = [EMPTY] * 128
+        for i, row in enumerate(rows):
+            r = 7 - i
+            f = 0
+            for ch in row:
+                if ch.isdigit():
+                    f += int(ch)
+                    continue
+                if ch not in _FEN_PIECES or f > 7:
+                    raise ValueError(f"bad FEN rank {row!r}")
+                b.squares[rf_to_idx(f, r)] = _FEN_PIECES[ch]
+                f += 1
+            if f != 8:
+                raise ValueError(f"bad FEN rank {row!r}")
+        kings = [p for p in b.squares if p != EMPTY and piece_type(p) == KING]
+        if sorted(kings) != [make_piece_idx(WHITE, KING), make_piece_idx(BLACK, KING)]:
+            raise ValueError(f"bad FEN (need one king each): {fen!r}")
+
+        if parts[1] not in ("w", "b"):
+            raise ValueError(f"bad FEN side to move {parts[1]!r}")
+        b.side_to_move = WHITE if parts[1] == "w" else BLACK
+        b.castling_rights = 0
+        for ch, bit in _FEN_CASTLING:
+            if ch in parts[2]:
+                b.castling_rights |= bit
+        # drop rights whose king or rook has moved, movegen trusts them
+        for bit, king, rook in _CASTLING_HOMES:
+            if b.squares[king[0]] != king[1] or b.squares[rook[0]] != rook[1]:
+                b.castling_rights &= ~bit
+        b.ep_square = -1
+        ep = parts[3]
+        if ep != "-":
+            if len(ep) != 2 or ep[0] not in "abcdefgh" or ep[1] not in "36":
+                raise ValueError(f"bad FEN en passant square {ep!r}")
+            # only keep it if a pawn really just made the double push
+            ep_sq = uci_to_idx(ep)
+            behind = ep_sq - 16 if b.side_to_move == WHITE else ep_sq + 16
+            pusher = make_piece_idx(b.side_to_move ^ 1, PAWN)
+            if b.squares[behind] == pusher and b.squares[ep_sq] == EMPTY:
+                b.ep_square = ep_sq
+        if len(parts) == 6:
+            b.halfmove_clock = int(parts[4])
+            b.fullmove_number = int(parts[5])
+        else:
+            b.halfmove_clock = 0
+            b.fullmove_number = 1
+        b._setup()
+        return b
+
+    def to_fen(self) -> str:
+        rows = []
+        for r in range(7, -1, -1):
+            row = ""
+            empty = 0
+            for f in range(8):
+                p = self.squares[rf_to_idx(f, r)]
+                if p == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += PIECE_CHARS[p]
+            if empty:
+                row += str(empty)
+            rows.append(row)
+        castling = "".join(ch for ch, bit in _FEN_CASTLING if self.castling_rights & bit)
+        ep = idx_to_uci(self.ep_square) if self.ep_square != -1 else "-"
+        side = "w" if self.side_to_move == WHITE else "b"
+        return (
+            f"{'/'.join(rows)} {side} {castling or '-'} {ep} "
+            f"{self.halfmove_clock} {self.fullmove_number}"
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Board":
+        pieces, side, castling, ep, halfmove, fullmove = _BOARD_STRUCT.unpack(data)
+        b = cls()
+        b.squares = [EMPTY] * 128
+        for i, p in enumerate(pieces):
+            b.squares[((i >> 3) << 4) | (i & 7)] = p
+        b.side_to_move = side
+        b.castling_rights = castling
+        b.ep_square = -1 if ep == 0xFF else ep
+        b.halfmove_clock = halfmove
+        b.fullmove_number = fullmove
+        b._setup()
+        return b
+
+    def _index_pieces(self) -> None:
+        """Rebuild king squares and piece lists from squares."""
+        self.king_sq = [-1, -1]
+        self.piece_squares = [set(), set()]
+        for idx in range(128):
+            if not on_board(idx):
+                continue
+            p = self.squares[idx]
+            if p == EMPTY:
+                continue
+            self.piece_squares[piece_color(p)].add(idx)
+            if piece_type(p) == KING:
+                self.king_sq[piece_color(p)] = idx
+
+    def compute_zobrist(self) -> int:
+        """Hash the position from scratch (slow, for setup and verification)."""
+        h = 0
+        for idx in range(128):
+            if not on_board(idx):
+                continue
+            p = self.squares[idx]
+            if p != EMPTY:
+                h ^= ZOBRIST_PIECE[p][idx]
+        if self.side_to_move == BLACK:
+            h ^= ZOBRIST_SIDE
+        h ^= ZOBRIST_CASTLING[self.castling_rights]
+        if self.ep_square != -1:
+            h ^= ZOBRIST_EP_FILE[self.ep_square & 7]
+        return h
+
+    def compute_pawn_key(self) -> int:
+        h = 0
+        for idx in range(128):
+            if not on_board(idx):
+                continue
+            p = self.squares[idx]
+            if p != EMPTY and piece_type(p) == PAWN:
+                h ^= ZOBRIST_PIECE[p][idx]
+        return h
+
+    def compute_psqt(self) -> Tuple[int, int, int]:
+        """(midgame, endgame, phase) totals from scratch, for setup and verification."""
+        mg = eg = phase = 0
+        for idx in range(128):
+            if not on_board(idx):
+                continue
+            p = self.squares[idx]
+            if p != EMPTY:
+                mg += PST_MG[p][idx]
+                eg += PST_EG[p][idx]
+                phase += PHASE_BY_CODE[p]
+        return mg, eg, phase
 
     def copy(self) -> "Board":
-        b = Board()
+        b = type(self)()
         b.squares = self.squares.copy()
         b.side_to_move = self.side_to_move
         b.castling_rights = self.castling_rights
         b.ep_square = self.ep_square
         b.halfmove_clock = self.halfmove_clock
         b.fullmove_number = self.fullmove_number
+        b.zobrist = self.zobrist
+        b.pawn_key = self.pawn_key
+        b.king_sq = self.king_sq.copy()
+        b.piece_squares = [self.piece_squares[0].copy(), self.piece_squares[1].copy()]
+        b.psqt_mg = self.psqt_mg
+        b.psqt_eg = self.psqt_eg
+        b.phase = self.phase
         return b
 
     # text-based board (chat gpt wrote this)
@@ -154,11 +414,56 @@ class Board:
     def __str__(self) -> str:
         return self.ascii()
 
+    @property
+    def ply(self) -> int:
+        """Number of moves currently on the make/unmake stack."""
+        return self._undo_top // UNDO_STRIDE
+
     def make_move(
         self, frm: int, to: int, promo_type: int | None = None
     ) -> UndoSnapshot:
-        moved = self.squares[frm]
-        captured = self.squares[to]
+        """Make a move and return a snapshot that undo_move can restore from.
+
+        For callers that hold on to history (GUI, CLI). Search uses make/unmake.
+        """
+        self._make(frm, to, promo_type or 0)
+        top = self._undo_top - UNDO_STRIDE
+        self._undo_top = top
+        return UndoSnapshot(*self._undo[top : top + UNDO_STRIDE])
+
+    def undo_move(self, prev: UndoSnapshot) -> None:
+        top = self._undo_top
+        if top == len(self._undo):
+            self._undo.extend([0] * (UNDO_STACK_PLIES * UNDO_STRIDE))
+        self._undo[top : top + UNDO_STRIDE] = (
+            prev.frm,
+            prev.to,
+            prev.moved,
+            prev.captured,
+            prev.ep_square,
+            prev.castling_rights,
+            prev.halfmove_clock,
+            prev.fullmove_number,
+            prev.captured_square,
+            prev.rook_from,
+            prev.rook_to,
+            prev.zobrist,
+            prev.psqt_mg,
+            prev.psqt_eg,
+            prev.phase,
+            prev.pawn_key,
+        )
+        self._undo_top = top + UNDO_STRIDE
+        self.unmake()
+
+    def make(self, m: int) -> None:
+        """Make a packed move (see move.encode_move), pushing its undo record."""
+        self._make(m & 0x7F, (m >> 7) & 0x7F, (m >> 14) & 0x7)
+
+    def _make(self, frm: int, to: int, promo_type: int) -> None:
+        squares = self.squares
+        moved = squares[frm]
+        captured = squares[to]
 
         side = self.side_to_move
         ptype = piece_type(moved)
@@ -173,7 +478,7 @@ class Board:
         captured_square = -1
         if is_ep_capture:
             captured_square = to - 16 if side == WHITE else to + 16
-            captured = self.squares[captured_square]
+            captured = squares[captured_square]
 
         rook_from = -1
         rook_to = -1
@@ -187,20 +492,39 @@ class Board:
                 rook_from = rf_to_idx(0, rank)
                 rook_to = rf_to_idx(3, rank)
 
-        # snapshot state
-        prev = UndoSnapshot(
-            frm=frm,
-            to=to,
-            moved=moved,
-            captured=captured,
-            ep_square=self.ep_square,
-            castling_rights=self.castling_rights,
-            halfmove_clock=self.halfmove_clock,
-            fullmove_number=self.fullmove_number,
-            captured_square=captured_square,
-            rook_from=rook_from,
-            rook_to=rook_to,
-        )
+        # push undo record
+        u = self._undo
+        top = self._undo_top
+        if top == len(u):
+            u.extend([0] * (UNDO_STACK_PLIES * UNDO_STRIDE))
+        u[top + _U_FRM] = frm
+        u[top + _U_TO] = to
+        u[top + _U_MOVED] = moved
+        u[top + _U_CAPTURED] = captured
+        u[top + _U_EP] = self.ep_square
+        u[top + _U_CASTLING] = self.castling_rights
+        u[top + _U_HALFMOVE] = self.halfmove_clock
+        u[top + _U_FULLMOVE] = self.fullmove_number
+        u[top + _U_CAPTURED_SQUARE] = captured_square
+        u[top + _U_ROOK_FROM] = rook_from
+        u[top + _U_ROOK_TO] = rook_to
+        u[top + _U_ZOBRIST] = self.zobrist
+        u[top + _U_PSQT_MG] = self.psqt_mg
+        u[top + _U_PSQT_EG] = self.psqt_eg
+        u[top + _U_PHASE] = self.phase
+        u[top + _U_PAWN_KEY] = self.pawn_key
+        self._undo_top = top + UNDO_STRIDE
+
+        pst_mg = PST_MG
+        pst_eg = PST_EG
+        mg = self.psqt_mg
+        eg = self.psqt_eg
+
+        h = self.zobrist
+        # xor out the old castling/ep state, the new state gets xored back in below
+        h ^= ZOBRIST_CASTLING[self.castling_rights]
+        if self.ep_square != -1:
+            h ^= ZOBRIST_EP_FILE[self.ep_square & 7]
 
         # apply move
         if is_pawn or captured != EMPTY:
@@ -208,61 +532,169 @@ class Board:
         else:
             self.halfmove_clock += 1
 
+        own = self.piece_squares[side]
         # clear en passant capture square
         if is_ep_capture:
-            self.squares[captured_square] = EMPTY
+            squares[captured_square] = EMPTY
+            h ^= ZOBRIST_PIECE[captured][captured_square]
+            self.piece_squares[side ^ 1].discard(captured_square)
+            mg -= pst_mg[captured][captured_square]
+            eg -= pst_eg[captured][captured_square]
+            self.pawn_key ^= ZOBRIST_PIECE[captured][captured_square]
+        elif captured != EMPTY:
+            h ^= ZOBRIST_PIECE[captured][to]
+            self.piece_squares[side ^ 1].discard(to)
+            mg -= pst_mg[captured][to]
+            eg -= pst_eg[captured][to]
+            self.phase -= PHASE_BY_CODE[captured]
+            if piece_type(captured) == PAWN:
+                self.pawn_key ^= ZOBRIST_PIECE[captured][to]
 
         # move rook if castling
         if rook_from != -1:
-            self.squares[rook_to] = self.squares[rook_from]
-            self.squares[rook_from] = EMPTY
+            rook = squares[rook_from]
+            squares[rook_to] = rook
+            squares[rook_from] = EMPTY
+            h ^= ZOBRIST_PIECE[rook][rook_from] ^ ZOBRIST_PIECE[rook][rook_to]
+            own.discard(rook_from)
+            own.add(rook_to)
+            mg += pst_mg[rook][rook_to] - pst_mg[rook][rook_from]
+            eg += pst_eg[rook][rook_to] - pst_eg[rook][rook_from]
 
         # normal move
-        self.squares[to] = moved
-        self.squares[frm] = EMPTY
+        squares[to] = moved
+        squares[frm] = EMPTY
+        h ^= ZOBRIST_PIECE[moved][frm]
+        own.discard(frm)
+        own.add(to)
+        if ptype == KING:
+            self.king_sq[side] = to
 
         # promotion (overwrite the moved piece on destination)
         if promo_type:
             color = piece_color(moved)
-            self.squares[to] = make_piece_idx(color, promo_type)
+            squares[to] = make_piece_idx(color, promo_type)
+            self.phase += PHASE_BY_CODE[squares[to]]
+        placed = squares[to]
+        h ^= ZOBRIST_PIECE[placed][to]
+        if is_pawn:
+            pk = self.pawn_key ^ ZOBRIST_PIECE[moved][frm]
+            self.pawn_key = pk if promo_type else pk ^ ZOBRIST_PIECE[moved][to]
+        self.psqt_mg = mg + pst_mg[placed][to] - pst_mg[moved][frm]
+        self.psqt_eg = eg + pst_eg[placed][to] - pst_eg[moved][frm]
 
         # update castling rights (clear bits if king/rook moved or rook captured)
-        self._update_castling_rights(frm, to, moved, captured)
+        if self.castling_rights:
+            self._update_castling_rights(frm, to, moved, captured)
 
         # set new ep square
         if is_double_push:
             self.ep_square = frm + 16 if side == WHITE else frm - 16
+            h ^= ZOBRIST_EP_FILE[self.ep_square & 7]
         else:
             self.ep_square = -1
 
+        h ^= ZOBRIST_CASTLING[self.castling_rights]
+
         if side == BLACK:
             self.fullmove_number += 1
         self.side_to_move ^= 1
+        self.zobrist = h ^ ZOBRIST_SIDE
+
+        if self.accumulator is not None:
+            if captured != EMPTY and captured_square == -1:
+                captured_square = to
+            self.accumulator.push(
+                moved, frm, placed, to, captured, captured_square, rook_from, rook_to
+            )
+
+    def unmake(self) -> None:
+        """Undo the last make() (or make_null()) by popping its undo record."""
+        top = self._undo_top - UNDO_STRIDE
+        u = self._undo
+        frm = u[top + _U_FRM]
+        if frm == -1:
+            # null move record, e.g. when an aborted search unwinds the stack
+            self.unmake_null()
+            return
+        self._undo_top = top
+        squares = self.squares
+        to = u[top + _U_TO]
+        moved = u[top + _U_MOVED]
+        captured = u[top + _U_CAPTURED]
+        captured_square = u[top + _U_CAPTURED_SQUARE]
+        rook_from = u[top + _U_ROOK_FROM]
 
-        return prev
-
-    def undo_move(self, prev: UndoSnapshot) -> None:
         self.side_to_move ^= 1
+        side = self.side_to_move
+        own = self.piece_squares[side]
 
         # restore rook if castling
-        if prev.rook_from != -1:
-            self.squares[prev.rook_from] = self.squares[prev.rook_to]
-            self.squares[prev.rook_to] = EMPTY
+        if rook_from != -1:
+            rook_to = u[top + _U_ROOK_TO]
+            squares[rook_from] = squares[rook_to]
+            squares[rook_to] = EMPTY
+            own.discard(rook_to)
+            own.add(rook_from)
 
         # restore captured pawn square for en passant
-        if prev.captured_square != -1:
-            self.squares[prev.captured_square] = prev.captured
-            self.squares[prev.to] = EMPTY
+        if captured_square != -1:
+            squares[captured_square] = captured
+            squares[to] = EMPTY
+            self.piece_squares[side ^ 1].add(captured_square)
         else:
             # restore destination square to normal capture
-            self.squares[prev.to] = prev.captured
+            squares[to] = captured
+            if captured != EMPTY:
+                self.piece_squares[side ^ 1].add(to)
 
         # restore normal move
-        self.squares[prev.frm] = prev.moved
-        self.ep_square = prev.ep_square
-        self.castling_rights = prev.castling_rights
-        self.halfmove_clock = prev.halfmove_clock
-        self.fullmove_number = prev.fullmove_number
+        squares[frm] = moved
+        own.discard(to)
+        own.add(frm)
+        if piece_type(moved) == KING:
+            self.king_sq[side] = frm
+        self.ep_square = u[top + _U_EP]
+        self.castling_rights = u[top + _U_CASTLING]
+        self.halfmove_clock = u[top + _U_HALFMOVE]
+        self.fullmove_number = u[top + _U_FULLMOVE]
+        self.zobrist = u[top + _U_ZOBRIST]
+        self.psqt_mg = u[top + _U_PSQT_MG]
+        self.psqt_eg = u[top + _U_PSQT_EG]
+        self.phase = u[top + _U_PHASE]
+        self.pawn_key = u[top + _U_PAWN_KEY]
+        if self.accumulator is not None:
+            self.accumulator.pop()
+
+    def make_null(self) -> None:
+        """Pass: flip side to move and clear ep without moving anything (null-move pruning)."""
+        u = self._undo
+        top = self._undo_top
+        if top == len(u):
+            u.extend([0] * (UNDO_STACK_PLIES * UNDO_STRIDE))
+        # frm -1 marks a null record, the rest of its fields are stale
+        u[top + _U_FRM] = -1
+        u[top + _U_EP] = self.ep_square
+        u[top + _U_HALFMOVE] = self.halfmove_clock
+        u[top + _U_ZOBRIST] = self.zobrist
+        self._undo_top = top + UNDO_STRIDE
+
+        h = self.zobrist ^ ZOBRIST_SIDE
+        if self.ep_square != -1:
+            h ^= ZOBRIST_EP_FILE[self.ep_square & 7]
+            self.ep_square = -1
+        self.zobrist = h
+        self.halfmove_clock += 1
+        self.side_to_move ^= 1
+
+    def unmake_null(self) -> None:
+        top = self._undo_top - UNDO_STRIDE
+        self._undo_top = top
+        u = self._undo
+        self.side_to_move ^= 1
+        self.ep_square = u[top + _U_EP]
+        self.halfmove_clock = u[top + _U_HALFMOVE]
+        self.zobrist = u[top + _U_ZOBRIST]
 
     # helpers
     def piece_at(self, idx: int) -> int:
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import threading
+from dataclasses import replace
 from typing import Optional
 
+from . import rootsplit, uci
+from .bitboard import BitBoard
 from .board import BLACK, WHITE, Board, idx_to_uci, on_board, promo_suffix
-from .engine import select_move
+from .engine import DEFAULT_TT_MB, SearchResult, search
+from .eval import EvalCache
 from .move import Move
 from .movegen import generate_legal, in_check
+from .perft import PerftCache, run_perft
+from .rootsplit import RootSplitPool
+from .smp import SmpPool
+from .timeman import SearchLimits
+from .tt import TranspositionTable
 
 
 # basic cli i/o
@@ -17,14 +28,156 @@ def main(argv: Optional[list[str]] = None) -> int:
     parser.add_argument(
         "--depth", type=int, default=3, help="Search depth for the engine."
     )
+    parser.add_argument(
+        "--movetime",
+        type=int,
+        default=None,
+        metavar="MS",
+        help="Think for this long per move instead of a fixed depth.",
+    )
+    parser.add_argument(
+        "--nodes",
+        type=int,
+        default=None,
+        help="Stop searching after this many nodes instead of a fixed depth.",
+    )
+    parser.add_argument(
+        "--hash",
+        type=int,
+        default=DEFAULT_TT_MB,
+        help="Transposition table size in MB.",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Search processes (lazy SMP when more than 1).",
+    )
+    parser.add_argument(
+        "--root-split",
+        type=int,
+        default=0,
+        metavar="WORKERS",
+        help="Spread root moves over this many worker processes (fixed depth only).",
+    )
+    parser.add_argument(
+        "--eval-cache",
+        type=int,
+        default=0,
+        metavar="MB",
+        help="Eval cache size in MB (0 = off).",
+    )
+    parser.add_argument(
+        "--bitboard",
+        action="store_true",
+        help="Use the bitboard backend instead of the 0x88 board.",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print search statistics after every engine move.",
+    )
+    parser.add_argument(
+        "--nnue",
+        default=None,
+        metavar="FILE",
+        help="Evaluate with this network (.npz, needs numpy) instead of the classical eval.",
+    )
+    sub = parser.add_subparsers(dest="command")
+    perft_p = sub.add_parser(
+        "perft", help="Count leaf nodes to a depth and report time / NPS."
+    )
+    perft_p.add_argument("depth", type=int)
+    perft_p.add_argument(
+        "--divide", action="store_true", help="Print counts per root move."
+    )
+    perft_p.add_argument(
+        "--fen", default=None, help="Start from this position instead of the initial one."
+    )
+    perft_p.add_argument(
+        "--moves", nargs="*", default=[], help="UCI moves to play from the start."
+    )
+    perft_p.add_argument(
+        "--cache",
+        type=int,
+        default=0,
+        metavar="MB",
+        help="Hashed perft cache size in MB (0 = off).",
+    )
+    bench_p = sub.add_parser(
+        "nnue-bench", help="Compare nnue and classical eval speed (evals/sec)."
+    )
+    bench_p.add_argument(
+        "--weights",
+        default=None,
+        metavar="FILE",
+        help="Network to time (default: a random one).",
+    )
+    bench_p.add_argument(
+        "--hidden", type=int, default=64, help="Hidden size of the random network."
+    )
+    bench_p.add_argument(
+        "--games", type=int, default=50, help="Random games to replay."
+    )
+
+    sub.add_parser(
+        "uci", help="Speak UCI on stdin/stdout (for GUIs and match managers)."
+    )
+
+    split_p = sub.add_parser(
+        "split-bench", help="Time root-split search against worker count."
+    )
+    split_p.add_argument("depth", type=int)
+    split_p.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to try."
+    )
+    split_p.add_argument(
+        "--moves", nargs="*", default=[], help="UCI moves to play from the start."
+    )
 
     args = parser.parse_args(argv)
+    if args.command == "uci":
+        return uci.main(hash_mb=args.hash, threads=args.threads, bitboard=args.bitboard)
+    if args.command == "split-bench":
+        return split_bench_command(args)
+    if args.command == "perft":
+        return perft_command(args)
+    if args.command == "nnue-bench":
+        return nnue_bench_command(args)
+    if args.nnue and args.eval_cache:
+        parser.error("--eval-cache only works with the classical eval, not --nnue")
+    if args.threads > 1 and args.eval_cache:
+        parser.error("--eval-cache only works with --threads 1")
+    if args.root_split and (args.threads > 1 or args.eval_cache or args.nnue):
+        parser.error("--root-split can't be combined with --threads, --eval-cache or --nnue")
+    if args.root_split and (args.movetime is not None or args.nodes is not None):
+        parser.error("--root-split only works with --depth")
 
     if hasattr(args, "depth") and args.depth is not None:
         depth = args.depth
     else:
         depth = 4
-    board = Board()
+    if args.movetime is not None or args.nodes is not None:
+        limits = SearchLimits(movetime=args.movetime, nodes=args.nodes)
+    else:
+        limits = SearchLimits(depth=depth)
+    board = BitBoard() if args.bitboard else Board()
+    # kept for the whole session so later searches reuse earlier results
+    smp = None
+    if args.threads > 1:
+        # helpers and the shared table are set up once, not per move
+        smp = SmpPool(args.threads, args.hash)
+        atexit.register(smp.close)
+        tt = smp.tt
+    else:
+        tt = TranspositionTable(args.hash)
+    eval_cache = EvalCache(args.eval_cache) if args.eval_cache else None
+    root_split = RootSplitPool(args.root_split) if args.root_split else None
+    nnue = None
+    if args.nnue:
+        from .nnue import load_weights
+
+        nnue = load_weights(args.nnue)
     print(board)
     print("Enter UCI moves like e2e4, g8f6, or 'quit'.")
 
@@ -59,8 +212,40 @@ def main(argv: Optional[list[str]] = None) -> int:
                 else:
                     print("No legal moves: stalemate.")
                 return 0
-            mv = select_move(board, depth=depth)
+            # search in a thread so ctrl-c can stop it and still get a move
+            stop = threading.Event()
+            done = threading.Event()
+            found: list[SearchResult] = []
+
+            def think() -> None:
+                try:
+                    found.append(
+                        search(
+                            board,
+                            tt=tt,
+                            limits=replace(limits, stop=stop),
+                            eval_cache=eval_cache,
+                            nnue=nnue,
+                            smp=smp,
+                            root_split=root_split,
+                        )
+                    )
+                finally:
+                    done.set()
+
+            threading.Thread(target=think, daemon=True).start()
+            try:
+                while not done.wait(0.1):
+                    pass
+            except KeyboardInterrupt:
+                print("\nstopping search")
+                stop.set()
+                done.wait()
+            result = found[0]
+            mv = result.move
             print(f"Engine plays: {move_to_uci(mv)}")
+            if args.stats:
+                print_stats(result)
             board.make_move(mv.frm, mv.to, mv.promo or None)
             print(board)
             continue
@@ -86,4 +271,78 @@ def main(argv: Optional[list[str]] = None) -> int:
 
 
 def move_to_uci(m: Move) -> str:
-    return f"{idx_to_uci(m.frm)}{idx_to_uci(m.to)}{promo_suffix(m.promo)}"
+    return m.to_uci()
+
+
+def print_stats(result: SearchResult) -> None:
+    st = result.stats
+    pv = " ".join(move_to_uci(m) for m in result.pv)
+    print(f"  depth {result.depth} (seldepth {st.seldepth})  score {result.score}  pv {pv}")
+    print(
+        f"  nodes {st.nodes} ({st.qnodes} quiescence)  {st.seconds:.3f}s  nps {st.nps}  "
+        f"ebf {result.ebf:.2f}"
+    )
+    print(
+        f"  tt hits {st.tt_hits}/{st.tt_probes} ({st.tt_hit_rate:.0%})  "
+        f"beta cutoffs {st.beta_cutoffs} ({st.first_move_cutoff_rate:.0%} on first move)"
+    )
+    for it in result.iterations:
+        pv = " ".join(move_to_uci(m) for m in it.pv)
+        print(f"  iter {it.depth:2}  {it.seconds:7.3f}s  {it.nodes:8} nodes  {it.score:6}  {pv}")
+
+
+def perft_command(args: argparse.Namespace) -> int:
+    cls = BitBoard if args.bitboard else Board
+    try:
+        board = cls.from_fen(args.fen) if args.fen else cls()
+    except ValueError as e:
+        print(f"bad fen: {e}")
+        return 1
+    for text in args.moves:
+        mv = Move.from_uci(text)
+        board.make_move(mv.frm, mv.to, mv.promo or None)
+    cache = PerftCache(args.cache) if args.cache > 0 else None
+
+    res = run_perft(board, args.depth, split=args.divide, cache=cache)
+    for m, n in res.divide:
+        print(f"{move_to_uci(m)}: {n}")
+    if res.divide:
+        print()
+    print(f"Depth: {res.depth}")
+    print(f"Nodes: {res.nodes}")
+    print(f"Time:  {res.seconds:.3f}s")
+    print(f"NPS:   {res.nps}")
+    if cache is not None:
+        print(f"Cache: {cache.hits} hits / {cache.misses} misses")
+    return 0
+
+
+def nnue_bench_command(args: argparse.Namespace) -> int:
+    from .nnue import benchmark, load_weights, random_weights
+
+    if args.weights:
+        weights = load_weights(args.weights)
+    else:
+        weights = random_weights(args.hidden)
+    print(f"Hidden: {weights.hidden}")
+    for name, evals, seconds in benchmark(weights, lines=args.games):
+        print(f"{name:24} {evals} evals  {seconds:.3f}s  {int(evals / seconds)} evals/s")
+    return 0
+
+
+def split_bench_command(args: argparse.Namespace) -> int:
+    board = BitBoard() if args.bitboard else Board()
+    for text in args.moves:
+        mv = Move.from_uci(text)
+        board.make_move(mv.frm, mv.to, mv.promo or None)
+
+    results = rootsplit.benchmark(board, args.depth, [0] + args.workers)
+    base_move, base_time = results[0][1], results[0][2]
+    print(f"single process: {move_to_uci(base_move)}  {base_time:.2f}s")
+    for n, m, seconds in results[1:]:
+        same = "same move" if m == base_move else "DIFFERENT MOVE"
+        print(
+            f"{n} workers: {move_to_uci(m)}  {seconds:.2f}s  "
+            f"speedup {base_time / seconds:.2f}x  {same}"
+        )
+    return 0
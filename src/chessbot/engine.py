@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+import time
+from dataclasses import dataclass, field, fields
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Tuple
 
 from .board import (
     BLACK,
     EMPTY,
+    KING,
     PAWN,
     WHITE,
     Board,
@@ -13,92 +16,756 @@ from .board import (
     piece_type,
     rf_to_idx,
 )
-from .eval import PIECE_VALUE, evaluate
-from .move import FLAG_EN_PASSANT, Move
-from .movegen import generate_legal, in_check
+from .eval import PIECE_VALUE, PIECE_VALUE_BY_CODE, EvalCache, evaluate
+from .move import (
+    FLAG_EN_PASSANT,
+    FLAG_PROMOTION,
+    FLAGS_SHIFT,
+    MOVE_BITS,
+    MOVE_MASK,
+    Move,
+    move_flags,
+    move_frm,
+    move_promo,
+    move_to,
+)
+from .movegen import generate_captures_packed, generate_legal_packed, in_check
+from .see import see
+from .timeman import SearchLimits, TimeManager
+from .tt import BOUND_EXACT, BOUND_LOWER, BOUND_UPPER, TranspositionTable
+
+if TYPE_CHECKING:
+    from .nnue import NNUEWeights
+    from .rootsplit import RootSplitPool
+    from .smp import SmpPool
 
 INF = 10_000_000
 MATE_SCORE = 1_000_000  # big value for checkmates
+MAX_PLY = 256
+DEFAULT_TT_MB = 16
+TT_MOVE_BONUS = 1_000_000  # hash move always sorts first
+DELTA_MARGIN = 200  # quiescence: skip captures that can't get back near alpha
+
+MAX_DEPTH = 64
+
+# move ordering tiers, higher searched first. quiet moves score by history,
+# which is kept below HISTORY_MAX so it never passes the killers
+ORDER_TT = 1 << 24
+ORDER_CAPTURE = 1 << 22
+ORDER_BAD_CAPTURE = -(1 << 22)  # SEE says it loses material: after the quiets
+ORDER_KILLER_1 = (1 << 21) + 2
+ORDER_KILLER_2 = (1 << 21) + 1
+ORDER_COUNTER = 1 << 21
+HISTORY_MAX = 1 << 20
+
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_R = 2
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVES = 3  # moves searched at full depth before reducing
+
+ASPIRATION_MIN_DEPTH = 4
+ASPIRATION_WINDOW = 40  # centipawns either side of the last iteration's score
+NODE_CHECK_INTERVAL = 256  # how often (in nodes) the clock and stop flag are looked at
+
+
+@dataclass
+class IterationInfo:
+    """Passed to select_move's on_iteration after every finished iteration.
+    nodes and seconds count from the start of the search."""
+
+    depth: int
+    score: int  # side to move's POV, centipawns or near +-MATE_SCORE
+    nodes: int
+    seconds: float
+    pv: List[Move]
+    seldepth: int = 0
+
+
+@dataclass
+class SearchStats:
+    """Counters for one search. They're plain int bumps in the search (most
+    only on cutoffs), so they're always on."""
+
+    nodes: int = 0  # every node, quiescence included
+    qnodes: int = 0
+    seldepth: int = 0  # deepest ply reached, quiescence included
+    tt_probes: int = 0
+    tt_hits: int = 0
+    beta_cutoffs: int = 0  # main search only
+    first_move_cutoffs: int = 0  # cutoffs by the first move searched
+    null_cutoffs: int = 0
+    pvs_researches: int = 0
+    lmr_researches: int = 0
+    aspiration_researches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.seconds) if self.seconds > 0 else 0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """How often the first move was the one that cut, ~0.9 is good ordering."""
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    def add(self, other: SearchStats) -> None:
+        """Fold in another search's counters (seconds are left alone)."""
+        for f in fields(self):
+            if f.name == "seldepth":
+                self.seldepth = max(self.seldepth, other.seldepth)
+            elif f.name != "seconds":
+                setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+@dataclass
+class SearchResult:
+    """What search() returns. score / depth / pv are from the last finished
+    iteration (depth 0 and an empty pv if none finished)."""
+
+    move: Move
+    score: int
+    depth: int
+    pv: List[Move]
+    stats: SearchStats
+    iterations: List[IterationInfo] = field(default_factory=list)
+
+    @property
+    def ebf(self) -> float:
+        """Effective branching factor: nodes of the last iteration over the one before."""
+        if len(self.iterations) < 2:
+            return 0.0
+        nodes = [0] + [it.nodes for it in self.iterations]
+        last, prev = nodes[-1] - nodes[-2], nodes[-2] - nodes[-3]
+        return last / prev if prev else 0.0
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when a hard limit is hit, caught at the root."""
+
+
+def select_move(
+    board: Board,
+    *,
+    depth: int = 3,
+    tt: TranspositionTable | None = None,
+    limits: SearchLimits | None = None,
+    eval_cache: EvalCache | None = None,
+    nnue: NNUEWeights | None = None,
+    smp: SmpPool | None = None,
+    root_split: RootSplitPool | None = None,
+    on_iteration: Callable[[IterationInfo], None] | None = None,
+) -> Move:
+    """Pick a move by iterative deepening, see search() for the options."""
+    return search(
+        board,
+        depth=depth,
+        tt=tt,
+        limits=limits,
+        eval_cache=eval_cache,
+        nnue=nnue,
+        smp=smp,
+        root_split=root_split,
+        on_iteration=on_iteration,
+    ).move
+
+
+def search(
+    board: Board,
+    *,
+    depth: int = 3,
+    tt: TranspositionTable | None = None,
+    limits: SearchLimits | None = None,
+    eval_cache: EvalCache | None = None,
+    nnue: NNUEWeights | None = None,
+    smp: SmpPool | None = None,
+    root_split: RootSplitPool | None = None,
+    on_iteration: Callable[[IterationInfo], None] | None = None,
+) -> SearchResult:
+    """Search by iterative deepening, returning the move with its score, PV
+    and stats.
+
+    With no limits this searches to a fixed depth. With limits (time, nodes,
+    depth) it returns the best move of the last iteration that finished.
+    Pass the same tt across calls to keep what it learned. eval_cache, if
+    given, sits in front of evaluate() (off by default). nnue swaps the
+    classical eval for that network. smp runs a lazy SMP search with that
+    pool's helper processes, on the pool's table (see smp.py). root_split
+    spreads the root moves of a fixed depth search over that pool instead
+    (see rootsplit.py). on_iteration gets an IterationInfo after each
+    finished iteration. Time limits count from when this is called.
+    """
+    start = time.perf_counter()
+    if limits is None:
+        limits = SearchLimits(depth=depth)
+    if smp is not None:
+        if eval_cache is not None:
+            raise ValueError("eval_cache can't be shared between processes")
+        if tt is not None and tt is not smp.tt:
+            raise ValueError("an smp search uses its pool's table, pass smp.tt or no tt")
+        from .smp import search_smp
+
+        return search_smp(
+            board, limits, smp, nnue=nnue, on_iteration=on_iteration, start=start
+        )
+    if tt is None:
+        tt = TranspositionTable(DEFAULT_TT_MB)
+    if root_split is not None:
+        if eval_cache is not None or nnue is not None:
+            raise ValueError("root_split only runs the classical eval")
+        from .rootsplit import search_root_split
+
+        tt.new_search()
+        return search_root_split(
+            board, tt, limits, root_split, on_iteration=on_iteration, start=start
+        )
+
+    tt.new_search()
+    if nnue is None:
+        fn = eval_cache.evaluate if eval_cache is not None else evaluate
+        s = _Search(board, tt, limits, fn, on_iteration=on_iteration, start=start)
+        return s.result(s.run())
+
+    if eval_cache is not None:
+        raise ValueError("eval_cache only caches the classical eval, not nnue")
+    from .nnue import Accumulator
+
+    acc = Accumulator(nnue, board)
+    try:
+        s = _Search(
+            board, tt, limits, acc.evaluate, on_iteration=on_iteration, start=start
+        )
+        return s.result(s.run())
+    finally:
+        acc.detach()
+
+
+class _Search:
+    """State for one select_move call."""
+
+    def __init__(
+        self,
+        board: Board,
+        tt: TranspositionTable,
+        limits: SearchLimits,
+        evaluate: Callable[[Board], int] = evaluate,
+        *,
+        depth_offset: int = 0,
+        on_iteration: Optional[Callable[[IterationInfo], None]] = None,
+        start: Optional[float] = None,
+    ) -> None:
+        self.board = board
+        self.tt = tt
+        # White POV static eval: eval.evaluate, a cache in front of it or nnue
+        self.evaluate = evaluate
+        self.limits = limits
+        self.time = TimeManager(limits, board.side_to_move, start)
+        self.max_depth = limits.depth or MAX_DEPTH
+        # lazy smp helpers start their iterations this much deeper
+        self.depth_offset = depth_offset
+        self.on_iteration = on_iteration
+        # last iteration that finished
+        self.completed_depth = 0
+        self.best_score = 0
+        self.iterations: List[IterationInfo] = []
+        self.nodes = 0
+        self.qnodes = 0
+        self.seldepth = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        # the table outlives the search, so count from where it was
+        self._tt_probes_at_start = tt.probes
+        self._tt_hits_at_start = tt.hits
+        self.pvs_researches = 0
+        self.aspiration_researches = 0
+        self.null_cutoffs = 0
+        self.lmr_researches = 0
+
+        # ordering heuristics, all fed by quiet moves that caused a beta cutoff
+        # killers: two slots per ply
+        self.killers: List[int] = [0] * (2 * (MAX_PLY + 1))
+        # history: per side, indexed by the frm|to bits of the packed move
+        self.history: List[List[int]] = [[0] * (128 * 128), [0] * (128 * 128)]
+        # countermove: the reply that refuted (piece, to) of the previous move
+        self.countermoves: List[int] = [0] * (16 * 128)
+        self._next_check = self._check_at()
+
+    def _check_at(self) -> int:
+        nxt = self.nodes + NODE_CHECK_INTERVAL
+        if self.limits.nodes is not None:
+            nxt = min(nxt, self.limits.nodes)
+        return nxt
+
+    def _checkup(self) -> None:
+        if self.limits.nodes is not None and self.nodes >= self.limits.nodes:
+            raise SearchAborted
+        if self.time.should_stop():
+            raise SearchAborted
+        self._next_check = self._check_at()
+
+    def run(self) -> Move:
+        board = self.board
+        side = board.side_to_move
+
+        moves = generate_legal_packed(board)
+        if not moves:
+            if in_check(board, side):
+                raise ValueError("Checkmated: no legal moves.")
+            raise ValueError("Stalemate: no legal moves.")
+
+        # fallback if even depth 1 gets cut off
+        best_move = _order_moves(board, moves, 0)[0]
+        score = 0
+        root_ply = board.ply
+        for depth in range(1 + self.depth_offset, self.max_depth + 1):
+            try:
+                best_move, score = self._aspiration(moves, depth, best_move, score)
+                self.completed_depth = depth
+                self.best_score = score
+                self._iteration_done(depth, score)
+            except SearchAborted:
+                self.unwind(root_ply)
+                break
+            if not self.time.can_start_iteration():
+                break
+        return Move.unpack(best_move)
+
+    def unwind(self, root_ply: int) -> None:
+        """Take back whatever an aborted search left on the board, null moves included."""
+        board = self.board
+        while board.ply > root_ply:
+            board.unmake()
+        # cheap enough once per abort, and a broken unwind corrupts the caller's game
+        assert board.zobrist == board.compute_zobrist(), "search left the board changed"
+
+    def _iteration_done(self, depth: int, score: int) -> None:
+        info = IterationInfo(
+            depth, score, self.nodes, self.time.elapsed(), self.pv(depth), self.seldepth
+        )
+        self.iterations.append(info)
+        if self.on_iteration is not None:
+            self.on_iteration(info)
 
-def select_move(board: Board, *, depth: int = 3) -> Move:
-    side = board.side_to_move
-    best_score = -INF
-    best_move: Move | None = None
+    def pv(self, max_len: int) -> List[Move]:
+        """Principal variation, read back from the TT's best moves."""
+        board = self.board
+        tt = self.tt
+        probes, hits = tt.probes, tt.hits
+        line: List[Move] = []
+        for _ in range(max_len):
+            entry = tt.probe(board.zobrist)
+            if entry is None or entry[3] not in generate_legal_packed(board):
+                break
+            board.make(entry[3])
+            line.append(Move.unpack(entry[3]))
+        for _ in line:
+            board.unmake()
+        # not the search's probes, keep them out of the stats
+        tt.probes, tt.hits = probes, hits
+        return line
 
-    moves = generate_legal(board)
-    if not moves:
-        if in_check(board, side):
-            raise ValueError("Checkmated: no legal moves.")
-        raise ValueError("Stalemate: no legal moves.")
+    def stats(self) -> SearchStats:
+        return SearchStats(
+            nodes=self.nodes,
+            qnodes=self.qnodes,
+            seldepth=self.seldepth,
+            tt_probes=self.tt.probes - self._tt_probes_at_start,
+            tt_hits=self.tt.hits - self._tt_hits_at_start,
+            beta_cutoffs=self.beta_cutoffs,
+            first_move_cutoffs=self.first_move_cutoffs,
+            null_cutoffs=self.null_cutoffs,
+            pvs_researches=self.pvs_researches,
+            lmr_researches=self.lmr_researches,
+            aspiration_researches=self.aspiration_researches,
+            seconds=self.time.elapsed(),
+        )
 
-    # captures first
-    moves.sort(key=lambda m: _move_order_key(board, m), reverse=True)
+    def result(self, move: Move) -> SearchResult:
+        pv = self.iterations[-1].pv if self.iterations else []
+        return SearchResult(
+            move, self.best_score, self.completed_depth, pv, self.stats(), self.iterations
+        )
 
-    alpha, beta = -INF, INF
-    for m in moves:
-        prev = board.make_move(m.frm, m.to, m.promo or None)
-        score = -_negamax(board, depth - 1, -beta, -alpha, ply=1)
-        board.undo_move(prev)
+    def _aspiration(
+        self, moves: Iterable[int], depth: int, pv_move: int, prev_score: int
+    ) -> Tuple[int, int]:
+        """Search the root in a narrow window around the last score, widening on a miss."""
+        if depth < ASPIRATION_MIN_DEPTH or abs(prev_score) >= MATE_SCORE - MAX_PLY:
+            return self._root(moves, depth, -INF, INF, pv_move)
 
-        if score > best_score:
-            best_score = score
-            best_move = m
-        if score > alpha:
-            alpha = score
+        delta = ASPIRATION_WINDOW
+        alpha, beta = prev_score - delta, prev_score + delta
+        while True:
+            best_move, score = self._root(moves, depth, alpha, beta, pv_move)
+            if score <= alpha:
+                alpha = max(score - delta, -INF)
+            elif score >= beta:
+                beta = min(score + delta, INF)
+                # the move that failed high is the one to try first next time
+                pv_move = best_move
+            else:
+                return best_move, score
+            self.aspiration_researches += 1
+            delta *= 2
 
-    assert best_move is not None
-    return best_move
+    def _root(
+        self, moves: Iterable[int], depth: int, alpha: int, beta: int, pv_move: int
+    ) -> Tuple[int, int]:
+        board = self.board
+        ordered = self._order(moves, pv_move, 0, 0)
 
-def _negamax(board: Board, depth: int, alpha: int, beta: int, *, ply: int) -> int:
-    side = board.side_to_move
+        alpha_orig = alpha
+        best_score = -INF
+        best_move = 0
+        for i, m in enumerate(ordered):
+            board.make(m)
+            score = self._pvs(i == 0, depth - 1, alpha, beta, ply=1, move=m)
+            board.unmake()
 
-    if depth == 0:
+            if score > best_score:
+                best_score = score
+                best_move = m
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= alpha_orig:
+            bound = BOUND_UPPER
+        elif best_score >= beta:
+            bound = BOUND_LOWER
+        else:
+            bound = BOUND_EXACT
+        self.tt.store(board.zobrist, best_score, depth, bound, best_move)
+        return best_move, best_score
+
+    def _pvs(
+        self, first: bool, depth: int, alpha: int, beta: int, *, ply: int, move: int
+    ) -> int:
+        """Score the move just made, from the parent's point of view.
+
+        The first move gets the full window. The rest get a null window that only
+        proves they're no better than alpha, re-searched in full if one turns out better.
+        """
+        if first:
+            return -self._negamax(depth, -beta, -alpha, ply=ply, prev_move=move)
+        score = -self._negamax(depth, -alpha - 1, -alpha, ply=ply, prev_move=move)
+        if alpha < score < beta:
+            self.pvs_researches += 1
+            score = -self._negamax(depth, -beta, -alpha, ply=ply, prev_move=move)
+        return score
+
+    def _negamax(
+        self, depth: int, alpha: int, beta: int, *, ply: int, prev_move: int
+    ) -> int:
+        if depth <= 0:
+            return self._quiesce(alpha, beta, ply=ply)
+
+        self.nodes += 1
+        if self.nodes >= self._next_check:
+            self._checkup()
+        if ply > self.seldepth:
+            self.seldepth = ply
+
+        board = self.board
+        tt = self.tt
+        side = board.side_to_move
+
+        alpha_orig = alpha
+        key = board.zobrist
+        tt_move = 0
+        entry = tt.probe(key)
+        if entry is not None:
+            tt_score, tt_depth, tt_bound, tt_move = entry
+            if tt_depth >= depth:
+                tt_score = _score_from_tt(tt_score, ply)
+                if tt_bound == BOUND_EXACT:
+                    return tt_score
+                if tt_bound == BOUND_LOWER and tt_score >= beta:
+                    return tt_score
+                if tt_bound == BOUND_UPPER and tt_score <= alpha:
+                    return tt_score
+
+        checked = in_check(board, side)
+        pv_node = beta - alpha > 1
+
+        # null move: if passing still beats beta, a real move would too.
+        # not in check, not twice in a row (prev_move 0 = null), and not with
+        # only pawns left where zugzwang makes passing look too good
+        if (
+            depth >= NULL_MOVE_MIN_DEPTH
+            and not pv_node
+            and not checked
+            and prev_move
+            and _has_non_pawn_material(board, side)
+            and self._static_score() >= beta
+        ):
+            r = NULL_MOVE_R + (depth >= 6)
+            board.make_null()
+            score = -self._negamax(depth - 1 - r, -beta, -beta + 1, ply=ply + 1, prev_move=0)
+            board.unmake_null()
+            if score >= beta:
+                self.null_cutoffs += 1
+                # don't trust a mate found after passing
+                return beta if score >= MATE_SCORE - MAX_PLY else score
+
+        moves = generate_legal_packed(board)
+        if not moves:
+            # terminal: mate or stalemate
+            if checked:
+                # side to move is checkmated -> very bad for side
+                # prefer quicker mates (distance-to-mate)
+                return -MATE_SCORE + ply
+            else:
+                return 0  # stalemate
+
+        ordered = self._order(moves, tt_move, ply, prev_move)
+        squares = board.squares
+        killer_1 = self.killers[2 * ply]
+        killer_2 = self.killers[2 * ply + 1]
+
+        best = -INF
+        best_move = 0
+        for i, m in enumerate(ordered):
+            # late move reductions: well ordered quiet moves this far down the
+            # list rarely matter, so look at them shallower first
+            reduce = (
+                i >= LMR_MIN_MOVES
+                and depth >= LMR_MIN_DEPTH
+                and not checked
+                and not squares[(m >> 7) & 0x7F]
+                and not (m >> FLAGS_SHIFT) & (FLAG_EN_PASSANT | FLAG_PROMOTION)
+                and m != killer_1
+                and m != killer_2
+            )
+            board.make(m)
+            if reduce and not in_check(board, board.side_to_move):
+                r = 1 + (i >= 2 * LMR_MIN_MOVES and depth >= 6)
+                score = -self._negamax(
+                    depth - 1 - r, -alpha - 1, -alpha, ply=ply + 1, prev_move=m
+                )
+                if score > alpha:
+                    self.lmr_researches += 1
+                    score = self._pvs(False, depth - 1, alpha, beta, ply=ply + 1, move=m)
+            else:
+                score = self._pvs(i == 0, depth - 1, alpha, beta, ply=ply + 1, move=m)
+            board.unmake()
+
+            if score > best:
+                best = score
+                best_move = m
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                self.beta_cutoffs += 1
+                if i == 0:
+                    self.first_move_cutoffs += 1
+                self._record_cutoff(m, depth, ply, prev_move)
+                break  # alpha-beta cutoff
+
+        if best <= alpha_orig:
+            bound = BOUND_UPPER
+        elif best >= beta:
+            bound = BOUND_LOWER
+        else:
+            bound = BOUND_EXACT
+        # an upper bound has no real best move, all of them failed low
+        if bound == BOUND_UPPER:
+            best_move = 0
+        tt.store(key, _score_to_tt(best, ply), depth, bound, best_move)
+        return best
+
+    def _order(
+        self, moves: Iterable[int], tt_move: int, ply: int, prev_move: int
+    ) -> List[int]:
+        """Hash move, captures (MVV-LVA), killers, countermove, then quiets by history."""
+        squares = self.board.squares
+        history = self.history[self.board.side_to_move]
+        killer_1 = self.killers[2 * ply]
+        killer_2 = self.killers[2 * ply + 1]
+        counter = 0
+        if prev_move:
+            prev_to = (prev_move >> 7) & 0x7F
+            counter = self.countermoves[(squares[prev_to] << 7) | prev_to]
+
+        keys = []
+        for m in moves:
+            if m == tt_move:
+                score = ORDER_TT
+            else:
+                victim = squares[(m >> 7) & 0x7F]
+                flags = m >> FLAGS_SHIFT
+                if victim or flags & (FLAG_EN_PASSANT | FLAG_PROMOTION):
+                    victim_val = _VALUE_OF[victim] if victim else _EP_VALUE
+                    attacker_val = _VALUE_OF[squares[m & 0x7F]]
+                    # taking something worth at least the attacker can't lose,
+                    # only run the exchange when it might
+                    if victim_val < attacker_val and (s := see(self.board, m)) < 0:
+                        score = ORDER_BAD_CAPTURE + s
+                    else:
+                        score = (
+                            ORDER_CAPTURE
+                            + victim_val
+                            - attacker_val
+                            + (800 if flags & FLAG_PROMOTION else 0)
+                        )
+                elif m == killer_1:
+                    score = ORDER_KILLER_1
+                elif m == killer_2:
+                    score = ORDER_KILLER_2
+                elif m == counter:
+                    score = ORDER_COUNTER
+                else:
+                    score = history[m & 0x3FFF]
+            keys.append((score << MOVE_BITS) | m)
+        keys.sort(reverse=True)
+        return [k & MOVE_MASK for k in keys]
+
+    def _record_cutoff(self, m: int, depth: int, ply: int, prev_move: int) -> None:
+        board = self.board
+        squares = board.squares
+        # only quiet moves, captures are ordered well enough already
+        if squares[(m >> 7) & 0x7F] or (m >> FLAGS_SHIFT) & (
+            FLAG_EN_PASSANT | FLAG_PROMOTION
+        ):
+            return
+
+        k = 2 * ply
+        if self.killers[k] != m:
+            self.killers[k + 1] = self.killers[k]
+            self.killers[k] = m
+
+        if prev_move:
+            prev_to = (prev_move >> 7) & 0x7F
+            self.countermoves[(squares[prev_to] << 7) | prev_to] = m
+
+        history = self.history[board.side_to_move]
+        i = m & 0x3FFF
+        history[i] += depth * depth
+        if history[i] >= HISTORY_MAX:
+            # age everything so recent cutoffs matter more and scores stay bounded
+            for side_hist in self.history:
+                for j in range(len(side_hist)):
+                    side_hist[j] >>= 1
+
+    def _static_score(self) -> int:
+        """Static eval from the side to move's point of view."""
+        board = self.board
+        s = self.evaluate(board)
+        return s if board.side_to_move == WHITE else -s
+
+    def _quiesce(self, alpha: int, beta: int, *, ply: int) -> int:
+        """Search captures/promotions until the position is quiet, so depth 0 doesn't
+        stop in the middle of an exchange (horizon effect).
+
+        In check it still stands pat, searching every evasion here made the
+        tree several times bigger in tactical positions. It does look for a
+        legal move first though, so a mate on the last ply isn't missed.
+        """
+        self.nodes += 1
+        self.qnodes += 1
+        if self.nodes >= self._next_check:
+            self._checkup()
+        if ply > self.seldepth:
+            self.seldepth = ply
+
+        board = self.board
+        side = board.side_to_move
+        if in_check(board, side) and not generate_legal_packed(board):
+            return -MATE_SCORE + ply
         # Static evaluation is always from White's POV.
         # Negamax convention: flip by side to move.
-        s = evaluate(board)
-        return s if side == WHITE else -s
-
-    moves = generate_legal(board)
-    if not moves:
-        # terminal: mate or stalemate
-        if in_check(board, side):
-            # side to move is checkmated -> very bad for side
-            # prefer quicker mates (distance-to-mate)
-            return -MATE_SCORE + ply
-        else:
-            return 0  # stalemate
-
-    moves.sort(key=lambda m: _move_order_key(board, m), reverse=True)
-
-    best = -INF
-    for m in moves:
-        prev = board.make_move(m.frm, m.to, m.promo or None)
-        score = -_negamax(board, depth - 1, -beta, -alpha, ply=ply + 1)
-        board.undo_move(prev)
-
-        if score > best:
-            best = score
-        if best > alpha:
-            alpha = best
-        if alpha >= beta:
-            break  # alpha-beta cutoff
-    return best
-
-def _move_order_key(board: Board, m: Move) -> int:
-    att_val = PIECE_VALUE.get(piece_type(board.squares[m.frm]), 0)
+        s = self.evaluate(board)
+        stand_pat = s if side == WHITE else -s
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        best = stand_pat
+
+        for m in _order_moves(board, generate_captures_packed(board), 0):
+            # delta pruning: even winning this piece for free can't raise alpha
+            gain = _captured_value(board, m)
+            promo = move_promo(m)
+            if promo:
+                gain += PIECE_VALUE[promo] - PIECE_VALUE[PAWN]
+            if stand_pat + gain + DELTA_MARGIN <= alpha:
+                continue
+            # losing captures don't get searched here at all
+            if not promo and gain < _VALUE_OF[board.squares[m & 0x7F]] and see(board, m) < 0:
+                continue
+
+            board.make(m)
+            score = -self._quiesce(-beta, -alpha, ply=ply + 1)
+            board.unmake()
+
+            if score > best:
+                best = score
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+        return best
+
+
+# mate scores are stored relative to the node, not the root, so they stay
+# correct when the same position is reached at a different ply
+def _score_to_tt(score: int, ply: int) -> int:
+    if score >= MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score >= MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+def _has_non_pawn_material(board: Board, side: int) -> bool:
+    squares = board.squares
+    for sq in board.piece_squares[side]:
+        if piece_type(squares[sq]) not in (PAWN, KING):
+            return True
+    return False
+
+
+_VALUE_OF = PIECE_VALUE_BY_CODE
+_EP_VALUE = PIECE_VALUE[PAWN]
+
+
+def _order_moves(board: Board, moves: Iterable[int], tt_move: int) -> List[int]:
+    """Best-first order. Scores are packed above the move bits so a plain int sort does it."""
+    keys = [
+        ((TT_MOVE_BONUS if m == tt_move else _move_order_key(board, m)) << MOVE_BITS) | m
+        for m in moves
+    ]
+    keys.sort(reverse=True)
+    return [k & MOVE_MASK for k in keys]
+
+def _move_order_key(board: Board, m: int) -> int:
+    att_val = PIECE_VALUE.get(piece_type(board.squares[move_frm(m)]), 0)
     cap_val = _captured_value(board, m)
-    promo_bonus = 800 if m.promo else 0
+    promo_bonus = 800 if move_promo(m) else 0
     return cap_val - att_val + promo_bonus
 
-def _captured_value(board: Board, m: Move) -> int:
-    if m.flags & FLAG_EN_PASSANT:
-        behind = m.to - 16 if board.side_to_move == WHITE else m.to + 16
+def _captured_value(board: Board, m: int) -> int:
+    to = move_to(m)
+    if move_flags(m) & FLAG_EN_PASSANT:
+        behind = to - 16 if board.side_to_move == WHITE else to + 16
         if on_board(behind):
             p = board.squares[behind]
             if p != EMPTY and piece_type(p) == PAWN:
                 return PIECE_VALUE[PAWN]
         return 0
-    dst = board.squares[m.to]
+    dst = board.squares[to]
     if dst == EMPTY:
         return 0
-    return PIECE_VALUE.get(piece_type(dst), 0)
\ No newline at end of file
+    return PIECE_VALUE.get(piece_type(dst), 0)
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import os
+from array import array
 from typing import Tuple
 
 from .board import (
     BISHOP,
     BLACK,
     EMPTY,
-    KING,
     KNIGHT,
     PAWN,
     QUEEN,
@@ -14,22 +15,23 @@ from .board import (
     WHITE,
     Board,
     idx_to_rf,
-    on_board,
     piece_color,
     piece_type,
 )
+from .pieces import PIECE_VALUE, is_center
 
-PIECE_VALUE = {
-    PAWN: 100,
-    KNIGHT: 320,
-    BISHOP: 330,
-    ROOK: 500,
-    QUEEN: 900,
-    KING: 2000,
-}
+# same values indexed by full piece code (color|type), 0 for empty. for hot loops
+PIECE_VALUE_BY_CODE = [PIECE_VALUE.get(p & 0b111, 0) if p else 0 for p in range(16)]
 
-CENTER_FILES = {3, 4}
-CENTER_RANKS = {3, 4}
+# game phase from remaining pieces, 24 = all minor/major pieces on (midgame),
+# 0 = bare kings and pawns (endgame). see pst.py
+MAX_PHASE = 24
+
+# set CHESSBOT_DEBUG_EVAL=1 to check every evaluate() against evaluate_full()
+DEBUG_EVAL = os.environ.get("CHESSBOT_DEBUG_EVAL") == "1"
+
+# pawn hash entries, power of two
+PAWN_HASH_ENTRIES = 1 << 14
 
 # All this stuff from google
 
@@ -38,9 +40,10 @@ def _file_rank(idx: int) -> Tuple[int, int]:
     return idx & 7, idx >> 4
 
 
-def _is_center(idx: int) -> bool:
-    f, r = _file_rank(idx)
-    return (f in CENTER_FILES) and (r in CENTER_RANKS)
+def taper(mg: int, eg: int, phase: int) -> int:
+    """Blend midgame and endgame scores by phase."""
+    phase = min(phase, MAX_PHASE)
+    return (mg * phase + eg * (MAX_PHASE - phase)) // MAX_PHASE
 
 
 def _open_file_info(board: Board, file_idx: int) -> tuple[bool, bool]:
@@ -56,14 +59,151 @@ def _open_file_info(board: Board, file_idx: int) -> tuple[bool, bool]:
     return seen_w, seen_b
 
 
+class PawnHashTable:
+    """Caches what eval needs from the pawns alone, keyed by board.pawn_key.
+
+    Pawns move rarely compared to everything else, so most probes hit. Each
+    entry holds which files have white / black pawns (bit per file) and the
+    pawn structure score. Collisions just overwrite.
+    """
+
+    def __init__(self, entries: int = PAWN_HASH_ENTRIES) -> None:
+        assert entries & (entries - 1) == 0, "entries must be a power of two"
+        self.mask = entries - 1
+        self.keys = array("Q", bytes(8 * entries))
+        # white files in the low byte, black in the high byte
+        self.files = array("H", bytes(2 * entries))
+        self.scores = array("i", bytes(4 * entries))
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        n = self.mask + 1
+        self.keys = array("Q", bytes(8 * n))
+        self.files = array("H", bytes(2 * n))
+        self.scores = array("i", bytes(4 * n))
+        self.hits = self.misses = 0
+
+    def probe(self, board: Board) -> Tuple[int, int, int]:
+        """(white file mask, black file mask, pawn score) for the board's pawns."""
+        key = board.pawn_key
+        i = key & self.mask
+        # an empty slot has key 0, which is also the key of a pawnless board,
+        # and the zeroed entry is right for that too
+        if self.keys[i] == key:
+            self.hits += 1
+            files = self.files[i]
+            return files & 0xFF, files >> 8, self.scores[i]
+
+        self.misses += 1
+        w_files, b_files, score = _pawn_structure(board)
+        self.keys[i] = key
+        self.files[i] = w_files | (b_files << 8)
+        self.scores[i] = score
+        return w_files, b_files, score
+
+
+def _pawn_structure(board: Board) -> Tuple[int, int, int]:
+    w_files = b_files = score = 0
+    squares = board.squares
+    for col in (WHITE, BLACK):
+        for idx in board.piece_squares[col]:
+            if piece_type(squares[idx]) != PAWN:
+                continue
+            r = idx >> 4
+            if col == WHITE:
+                w_files |= 1 << (idx & 7)
+                score += r * 3
+            else:
+                b_files |= 1 << (idx & 7)
+                score -= (7 - r) * 3
+    return w_files, b_files, score
+
+
+# shared by every board, entries are keyed by pawn_key so that's fine
+PAWN_TABLE = PawnHashTable()
+
+
+class EvalCache:
+    """Optional cache in front of evaluate(), keyed by board.zobrist.
+
+    Transpositions reach the same leaves over and over, this saves redoing
+    their eval. Array backed, one entry per slot, collisions overwrite.
+    Scores are White's POV like evaluate().
+    """
+
+    ENTRY_BYTES = 12  # 8 key + 4 score
+
+    def __init__(self, size_mb: int) -> None:
+        n = 1
+        while n * 2 * self.ENTRY_BYTES <= size_mb * 1024 * 1024:
+            n *= 2
+        self.mask = n - 1
+        self.keys = array("Q", bytes(8 * n))
+        self.scores = array("i", bytes(4 * n))
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        n = self.mask + 1
+        self.keys = array("Q", bytes(8 * n))
+        self.scores = array("i", bytes(4 * n))
+        self.hits = self.misses = 0
+
+    def evaluate(self, board: Board) -> int:
+        key = board.zobrist
+        i = key & self.mask
+        # empty slots have key 0, a real position hashing to exactly 0 isn't a worry
+        if self.keys[i] == key:
+            self.hits += 1
+            return self.scores[i]
+        self.misses += 1
+        score = evaluate(board)
+        self.keys[i] = key
+        self.scores[i] = score
+        return score
+
+    def hit_rate(self) -> float:
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+
 # positive = good for white, negative = good for black
 def evaluate(board: Board) -> int:
+    # material and piece-square terms are kept up to date by the board
+    score = taper(board.psqt_mg, board.psqt_eg, board.phase)
+
+    # pawn advance and which files have pawns come from the pawn hash
+    w_files, b_files, pawn_score = PAWN_TABLE.probe(board)
+    score += pawn_score
+
+    # rooks on open / semi-open files
+    squares = board.squares
+    any_files = w_files | b_files
+    for col, own_files, sign in ((WHITE, w_files, 1), (BLACK, b_files, -1)):
+        for idx in board.piece_squares[col]:
+            if piece_type(squares[idx]) == ROOK:
+                bit = 1 << (idx & 7)
+                if not any_files & bit:  # open
+                    score += 12 * sign
+                elif not own_files & bit:  # semi-open
+                    score += 6 * sign
+
+    if DEBUG_EVAL:
+        full = evaluate_full(board)
+        assert score == full, f"incremental eval {score} != full eval {full}"
+    return score
+
+
+def evaluate_full(board: Board) -> int:
+    """Whole eval from scratch, square by square. Slow, used to check evaluate()."""
     score = 0
+    squares = board.squares
 
     for idx in range(128):
-        if not on_board(idx):
+        if idx & 0x88:
             continue
-        p = board.squares[idx]
+        p = squares[idx]
         if p == EMPTY:
             continue
 
@@ -79,10 +219,10 @@ def evaluate(board: Board) -> int:
             advance = r if col == WHITE else (7 - r)
             score += (advance * 3) if col == WHITE else -(advance * 3)
         elif typ == KNIGHT:
-            if _is_center(idx):
+            if is_center(idx):
                 score += 10 if col == WHITE else -10
         elif typ == BISHOP:
-            if _is_center(idx):
+            if is_center(idx):
                 score += 5 if col == WHITE else -5
         elif typ == ROOK:
             has_w, has_b = _open_file_info(board, f)
@@ -93,7 +233,7 @@ def evaluate(board: Board) -> int:
             ):  # semi-open
                 score += 6 if col == WHITE else -6
         elif typ == QUEEN:
-            if _is_center(idx):
+            if is_center(idx):
                 score += 3 if col == WHITE else -3
 
     return score
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import threading
 import tkinter as tk
 from tkinter import messagebox
 from typing import List, Optional
@@ -23,9 +24,11 @@ from .board import (
     promo_suffix,
     rf_to_idx,
 )
-from .engine import select_move
+from .engine import DEFAULT_TT_MB, select_move
 from .move import Move
 from .movegen import generate_legal, in_check
+from .timeman import SearchLimits
+from .tt import TranspositionTable
 
 SQUARE = 72  # pixels per square
 BOARD_PX = SQUARE * 8
@@ -63,7 +66,7 @@ class ChessGUI:
         self.canvas = tk.Canvas(
             self.root, width=BOARD_PX, height=BOARD_PX, highlightthickness=0
         )
-        self.canvas.grid(row=0, column=0, columnspan=4)
+        self.canvas.grid(row=0, column=0, columnspan=5)
 
         # Buttons
         tk.Button(self.root, text="Engine Move", command=self.engine_move).grid(
@@ -75,19 +78,27 @@ class ChessGUI:
         tk.Button(self.root, text="Reset", command=self.reset).grid(
             row=1, column=2, sticky="ew"
         )
+        tk.Button(self.root, text="Stop", command=self.stop_search).grid(
+            row=1, column=3, sticky="ew"
+        )
         self.depth_var = tk.IntVar(value=3)
         tk.Spinbox(self.root, from_=1, to=6, textvariable=self.depth_var, width=3).grid(
-            row=1, column=3, sticky="e"
+            row=1, column=4, sticky="e"
         )
 
         self.canvas.bind("<Button-1>", self.on_click)
 
         self.board = Board()
+        self.tt = TranspositionTable(DEFAULT_TT_MB)
         self.history: List[UndoSnapshot] = (
             []
         )  # your push() returns immutable Previous snapshots
         self.selected: Optional[int] = None
         self.legal_from_selected: List[Move] = []
+        # engine search running in the background, see engine_move
+        self.search_thread: Optional[threading.Thread] = None
+        self.search_stop = threading.Event()
+        self.search_result: List[Move] = []
 
         self.draw_all()
 
@@ -152,6 +163,8 @@ class ChessGUI:
 
     # ---------- interaction ----------
     def on_click(self, ev: tk.Event) -> None:
+        if self.search_thread is not None:
+            return  # engine is thinking
         file_ = ev.x // SQUARE
         r_gui = ev.y // SQUARE
         rank = 7 - r_gui
@@ -229,18 +242,45 @@ class ChessGUI:
 
     # ---------- controls ----------
     def engine_move(self) -> None:
+        if self.search_thread is not None:
+            return
         ms = generate_legal(self.board)
         if not ms:
             self._check_terminal()
             return
-        mv = select_move(self.board, depth=self.depth_var.get())
+        # search a copy in a thread so the window stays responsive and Stop works
+        board = self.board.copy()
+        limits = SearchLimits(depth=self.depth_var.get(), stop=self.search_stop)
+        self.search_stop.clear()
+        self.search_result = []
+        self.search_thread = threading.Thread(
+            target=lambda: self.search_result.append(
+                select_move(board, tt=self.tt, limits=limits)
+            ),
+            daemon=True,
+        )
+        self.search_thread.start()
+        self.root.after(50, self._poll_search)
+
+    def _poll_search(self) -> None:
+        if self.search_thread is not None and self.search_thread.is_alive():
+            self.root.after(50, self._poll_search)
+            return
+        self.search_thread = None
+        if not self.search_result:
+            return
+        mv = self.search_result[0]
         prev = self.board.make_move(mv.frm, mv.to, mv.promo or None)
         self.history.append(prev)
         self.draw_all()
         self._check_terminal()
 
+    def stop_search(self) -> None:
+        """Make the running search return the best move it has so far."""
+        self.search_stop.set()
+
     def undo(self) -> None:
-        if not self.history:
+        if not self.history or self.search_thread is not None:
             return
         prev = self.history.pop()
         self.board.undo_move(prev)  # your Board.pop accepts the immutable snapshot
@@ -249,7 +289,10 @@ class ChessGUI:
         self.draw_all()
 
     def reset(self) -> None:
+        if self.search_thread is not None:
+            return
         self.board = Board()
+        self.tt = TranspositionTable(DEFAULT_TT_MB)
         self.history.clear()
         self.selected = None
         self.legal_from_selected = []
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from .board import PROMO_MAP
+from .board import PROMO_MAP, idx_to_uci, promo_suffix
 
 FLAG_NONE = 0
 FLAG_PROMOTION = 1 << 0
@@ -10,6 +10,33 @@ FLAG_EN_PASSANT = 1 << 1
 FLAG_CASTLE = 1 << 2
 FLAG_DOUBLE_PAWN = 1 << 3
 
+# Packed moves for the search path: one int instead of a Move object.
+#   bits 0-6 frm, 7-13 to, 14-16 promo, 17-20 flags
+MOVE_BITS = 21
+MOVE_MASK = (1 << MOVE_BITS) - 1
+PROMO_SHIFT = 14
+FLAGS_SHIFT = 17
+
+
+def encode_move(frm: int, to: int, promo: int = 0, flags: int = FLAG_NONE) -> int:
+    return frm | (to << 7) | (promo << PROMO_SHIFT) | (flags << FLAGS_SHIFT)
+
+
+def move_frm(m: int) -> int:
+    return m & 0x7F
+
+
+def move_to(m: int) -> int:
+    return (m >> 7) & 0x7F
+
+
+def move_promo(m: int) -> int:
+    return (m >> PROMO_SHIFT) & 0x7
+
+
+def move_flags(m: int) -> int:
+    return m >> FLAGS_SHIFT
+
 
 @dataclass(frozen=True)
 class Move:
@@ -18,6 +45,16 @@ class Move:
     promo: int = 0
     flags: int = FLAG_NONE
 
+    def pack(self) -> int:
+        return encode_move(self.frm, self.to, self.promo, self.flags)
+
+    @staticmethod
+    def unpack(m: int) -> "Move":
+        return Move(move_frm(m), move_to(m), move_promo(m), move_flags(m))
+
+    def to_uci(self) -> str:
+        return f"{idx_to_uci(self.frm)}{idx_to_uci(self.to)}{promo_suffix(self.promo)}"
+
     @staticmethod
     def from_uci(uci: str) -> "Move":
         """Parse 'e2e4' or 'e7e8q' (promo)."""
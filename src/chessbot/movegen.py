@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from array import array
 from typing import List
 
+from . import bitboard
+from .bitboard import BitBoard
 from .board import (
     BISHOP,
     BLACK,
@@ -17,12 +20,22 @@ from .board import (
     WHITE_OO,
     WHITE_OOO,
     Board,
+    make_piece_idx,
     on_board,
     piece_color,
     piece_type,
     rf_to_idx,
 )
-from .move import FLAG_CASTLE, FLAG_DOUBLE_PAWN, FLAG_EN_PASSANT, FLAG_PROMOTION, Move
+from .move import (
+    FLAG_CASTLE,
+    FLAG_DOUBLE_PAWN,
+    FLAG_EN_PASSANT,
+    FLAG_PROMOTION,
+    FLAGS_SHIFT,
+    PROMO_SHIFT,
+    Move,
+    encode_move,
+)
 
 _rank_dist = 16
 
@@ -57,111 +70,267 @@ KNIGHT_DELTAS = (
 ROOK_DELTAS = (+1, -1, +_rank_dist, -_rank_dist)
 QUEEN_DELTAS = BISHOP_DELTAS + ROOK_DELTAS
 
-
-def _generate_pseudo_legal(board: Board) -> List[Move]:
-    """Return pseudo-legal moves for the side to move."""
+# 0x88 difference trick: to - frm + 119 is unique for every pair of on-board
+# squares (0..238). ATTACKS[diff] has bit 1 << piece_code set for every piece
+# that could hit to from frm on an empty board, RAY_STEP[diff] is the step to
+# walk for sliders (0 if the squares don't share a line).
+_DIFF = 119
+ATTACKS: List[int] = [0] * 239
+RAY_STEP: List[int] = [0] * 239
+
+
+def _fill_attack_tables() -> None:
+    for color in (WHITE, BLACK):
+        pawn = 1 << make_piece_idx(color, PAWN)
+        for d in (_rank_dist - 1, _rank_dist + 1):
+            ATTACKS[_DIFF + (d if color == WHITE else -d)] |= pawn
+        for d in KNIGHT_DELTAS:
+            ATTACKS[_DIFF + d] |= 1 << make_piece_idx(color, KNIGHT)
+        for d in KING_DELTAS:
+            ATTACKS[_DIFF + d] |= 1 << make_piece_idx(color, KING)
+        for deltas, kinds in ((BISHOP_DELTAS, (BISHOP, QUEEN)), (ROOK_DELTAS, (ROOK, QUEEN))):
+            bits = 0
+            for k in kinds:
+                bits |= 1 << make_piece_idx(color, k)
+            for d in deltas:
+                for n in range(1, 8):
+                    ATTACKS[_DIFF + d * n] |= bits
+                    RAY_STEP[_DIFF + d * n] = d
+
+
+_fill_attack_tables()
+
+# piece codes that slide, by bit
+_SLIDERS = 0
+for _c in (WHITE, BLACK):
+    for _k in (BISHOP, ROOK, QUEEN):
+        _SLIDERS |= 1 << make_piece_idx(_c, _k)
+
+
+def _generate_pseudo_legal(board: Board, out: array) -> None:
+    """Append pseudo-legal packed moves for the side to move to out."""
     side = board.side_to_move
-    out: List[Move] = []
+    squares = board.squares
+    for idx in board.piece_squares[side]:
+        p = piece_type(squares[idx])
+        if p == PAWN:
+            pawn_moves(board, idx, out)
+        elif p == KNIGHT:
+            leaper_moves(board, idx, KNIGHT_DELTAS, out)
+        elif p == BISHOP:
+            slider_moves(board, idx, BISHOP_DELTAS, out)
+        elif p == ROOK:
+            slider_moves(board, idx, ROOK_DELTAS, out)
+        elif p == QUEEN:
+            slider_moves(board, idx, QUEEN_DELTAS, out)
+        elif p == KING:
+            leaper_moves(board, idx, KING_DELTAS, out)
+            castle_candidates(board, idx, out)
 
-    for idx in range(128):
-        if not on_board(idx):
-            continue
-        piece = board.squares[idx]
-        if piece == EMPTY or piece_color(piece) != side:
-            continue
 
-        p = piece_type(piece)
+def _generate_pseudo_captures(board: Board, out: array) -> None:
+    """Like _generate_pseudo_legal but only captures and promotions (for quiescence)."""
+    side = board.side_to_move
+    squares = board.squares
+    for idx in board.piece_squares[side]:
+        p = piece_type(squares[idx])
         if p == PAWN:
-            out.extend(pawn_moves(board, idx))
+            pawn_captures(board, idx, out)
         elif p == KNIGHT:
-            out.extend(leaper_moves(board, idx, KNIGHT_DELTAS))
+            leaper_captures(board, idx, KNIGHT_DELTAS, out)
         elif p == BISHOP:
-            out.extend(slider_moves(board, idx, BISHOP_DELTAS))
+            slider_captures(board, idx, BISHOP_DELTAS, out)
         elif p == ROOK:
-            out.extend(slider_moves(board, idx, ROOK_DELTAS))
+            slider_captures(board, idx, ROOK_DELTAS, out)
         elif p == QUEEN:
-            out.extend(slider_moves(board, idx, QUEEN_DELTAS))
+            slider_captures(board, idx, QUEEN_DELTAS, out)
         elif p == KING:
-            out.extend(leaper_moves(board, idx, KING_DELTAS))
-            out.extend(castle_candidates(board, idx))
-
-    return out
+            leaper_captures(board, idx, KING_DELTAS, out)
 
 
 def generate_legal(board: Board) -> List[Move]:
+    """Legal moves for the side to move, as Move objects."""
+    return [Move.unpack(m) for m in generate_legal_packed(board)]
+
+
+def generate_legal_packed(board: Board) -> array:
+    """Legal moves for the side to move, packed (see move.encode_move)."""
+    if isinstance(board, BitBoard):
+        return bitboard.generate_legal_packed(board)
+    return _generate_legal(board, captures_only=False)
+
+
+def generate_captures_packed(board: Board) -> array:
+    """Legal captures and promotions only. Quiet moves are never generated."""
+    if isinstance(board, BitBoard):
+        return bitboard.generate_captures_packed(board)
+    return _generate_legal(board, captures_only=True)
+
+
+def _generate_legal(board: Board, *, captures_only: bool) -> array:
+    """Checkers and pins are found once up front, then each pseudo-legal move is
+    filtered against a check mask and its pin ray (0x88 square bitmasks).
+    Only king moves and en passant need an actual attack test.
+    """
     side = board.side_to_move
     opp = BLACK if side == WHITE else WHITE
-    legal: List[Move] = []
 
-    pre_in_check = in_check(board, side)
+    ksq = king_square(board, side)
+    checkers = attackers_to(board, ksq, opp)
+    n_checks = len(checkers)
+
+    pseudo = array("I")
+    # double check: only the king can move
+    if n_checks > 1:
+        if captures_only:
+            leaper_captures(board, ksq, KING_DELTAS, pseudo)
+        else:
+            leaper_moves(board, ksq, KING_DELTAS, pseudo)
+        return _legal_king_moves(board, ksq, opp, pseudo)
+
+    if n_checks == 1:
+        # capture the checker, or block if it's a slider
+        check_mask = _ray_mask(board, ksq, checkers[0])
+    else:
+        check_mask = -1  # every square
+
+    pins = _pin_masks(board, ksq, side)
+    legal = array("I")
+    king_moves = array("I")
 
-    for m in _generate_pseudo_legal(board):
-        # Can't castle while in check / through check
-        if m.flags & FLAG_CASTLE:
-            if pre_in_check:
+    if captures_only:
+        _generate_pseudo_captures(board, pseudo)
+    else:
+        _generate_pseudo_legal(board, pseudo)
+    for m in pseudo:
+        frm = m & 0x7F
+        if frm == ksq:
+            king_moves.append(m)
+            continue
+
+        to = (m >> 7) & 0x7F
+        if (m >> FLAGS_SHIFT) & FLAG_EN_PASSANT:
+            # ep removes two pieces from a rank, which masks don't cover
+            # (e.g. K and R on the 5th with both pawns between). just try it
+            board.make(m)
+            if not is_square_attacked(board, ksq, opp):
+                legal.append(m)
+            board.unmake()
+            continue
+
+        bit = 1 << to
+        if not check_mask & bit:
+            continue
+        pin = pins.get(frm)
+        if pin is not None and not pin & bit:
+            continue
+        legal.append(m)
+
+    legal.extend(_legal_king_moves(board, ksq, opp, king_moves, in_check=n_checks > 0))
+    return legal
+
+
+def _legal_king_moves(
+    board: Board, ksq: int, opp: int, moves: array, *, in_check: bool = True
+) -> array:
+    squares = board.squares
+    legal = array("I")
+    king = squares[ksq]
+    # lift the king so sliders see through its current square
+    squares[ksq] = EMPTY
+    for m in moves:
+        to = (m >> 7) & 0x7F
+        if (m >> FLAGS_SHIFT) & FLAG_CASTLE:
+            # Can't castle while in check / through check
+            if in_check:
+                continue
+            cross = (ksq + 1) if (to & 7) == 6 else (ksq - 1)
+            if is_square_attacked(board, cross, by_color=opp):
                 continue
-            to_file = m.to & 7
-            if side == WHITE:
-                e1 = rf_to_idx(4, 0)
-                cross = rf_to_idx(5, 0) if to_file == 6 else rf_to_idx(3, 0)
-                if is_square_attacked(board, e1, by_color=opp) or is_square_attacked(
-                    board, cross, by_color=opp
-                ):
-                    continue
-            else:
-                e8 = rf_to_idx(4, 7)
-                cross = rf_to_idx(5, 7) if to_file == 6 else rf_to_idx(3, 7)
-                if is_square_attacked(board, e8, by_color=opp) or is_square_attacked(
-                    board, cross, by_color=opp
-                ):
-                    continue
-
-        prev = board.make_move(m.frm, m.to, m.promo or None)
-        # Can't result in check
-        if not in_check(board, side):
+        if not is_square_attacked(board, to, by_color=opp):
             legal.append(m)
-        board.undo_move(prev)
-
+    squares[ksq] = king
     return legal
 
 
-def leaper_moves(board: Board, frm: int, deltas: tuple[int, ...]) -> List[Move]:
+def _ray_mask(board: Board, ksq: int, attacker: int) -> int:
+    """Squares that stop a check from attacker: its own square plus any in between."""
+    mask = 1 << attacker
+    if piece_type(board.squares[attacker]) in (BISHOP, ROOK, QUEEN):
+        d = _direction(ksq, attacker)
+        sq = ksq + d
+        while sq != attacker:
+            mask |= 1 << sq
+            sq += d
+    return mask
+
+
+def _direction(frm: int, to: int) -> int:
+    # only valid for squares on a shared rank/file/diagonal
+    df = (to & 7) - (frm & 7)
+    dr = (to >> 4) - (frm >> 4)
+    step_f = (df > 0) - (df < 0)
+    step_r = (dr > 0) - (dr < 0)
+    return step_r * _rank_dist + step_f
+
+
+def _pin_masks(board: Board, ksq: int, side: int) -> dict[int, int]:
+    """Map pinned square -> mask of squares it may still move to (the pin ray)."""
+    squares = board.squares
+    pins: dict[int, int] = {}
+    for d in QUEEN_DELTAS:
+        sliders = (ROOK, QUEEN) if d in ROOK_DELTAS else (BISHOP, QUEEN)
+        mask = 0
+        candidate = -1
+        sq = ksq + d
+        while on_board(sq):
+            mask |= 1 << sq
+            p = squares[sq]
+            if p != EMPTY:
+                if piece_color(p) == side:
+                    if candidate != -1:
+                        break  # two of ours, nothing pinned
+                    candidate = sq
+                else:
+                    if candidate != -1 and piece_type(p) in sliders:
+                        pins[candidate] = mask
+                    break
+            sq += d
+    return pins
+
+
+def leaper_moves(board: Board, frm: int, deltas: tuple[int, ...], out: array) -> None:
     side = board.side_to_move
     squares = board.squares
-    moves: List[Move] = []
     for d in deltas:
         to = frm + d
         if not on_board(to):
             continue
         dst = squares[to]
         if dst == EMPTY or piece_color(dst) != side:
-            moves.append(Move(frm, to))
-    return moves
+            out.append(frm | (to << 7))
 
 
-def slider_moves(board: Board, frm: int, deltas: tuple[int, ...]) -> List[Move]:
+def slider_moves(board: Board, frm: int, deltas: tuple[int, ...], out: array) -> None:
     side = board.side_to_move
     squares = board.squares
-    moves: List[Move] = []
     for d in deltas:
         to = frm + d
         while on_board(to):
             dst = squares[to]
             if dst == EMPTY:
-                moves.append(Move(frm, to))
+                out.append(frm | (to << 7))
                 to += d
                 continue
             # stop on first occupied
             if piece_color(dst) != side:
-                moves.append(Move(frm, to))
+                out.append(frm | (to << 7))
             break
-    return moves
 
 
-def pawn_moves(board: Board, frm: int) -> List[Move]:
+def pawn_moves(board: Board, frm: int, out: array) -> None:
     side = board.side_to_move
     squares = board.squares
-    moves: List[Move] = []
 
     forward = _rank_dist if side == WHITE else -_rank_dist
     start_rank = 1 if side == WHITE else 6
@@ -169,13 +338,13 @@ def pawn_moves(board: Board, frm: int) -> List[Move]:
 
     one = frm + forward
     if on_board(one) and squares[one] == EMPTY:
-        moves.extend(_promotions_or_single(frm, one, last_rank))
+        _promotions_or_single(frm, one, last_rank, out)
 
         # double push from start
         if (frm >> 4) == start_rank:
             two = one + forward
             if on_board(two) and squares[two] == EMPTY:
-                moves.append(Move(frm, two, flags=FLAG_DOUBLE_PAWN))
+                out.append(encode_move(frm, two, flags=FLAG_DOUBLE_PAWN))
 
     # captures
     for df in (-1, 1):
@@ -184,7 +353,7 @@ def pawn_moves(board: Board, frm: int) -> List[Move]:
             continue
         dst = squares[to]
         if dst != EMPTY and piece_color(dst) != side:
-            moves.extend(_promotions_or_single(frm, to, last_rank, capture=True))
+            _promotions_or_single(frm, to, last_rank, out)
 
     # en passant
     ep = board.ep_square
@@ -198,30 +367,85 @@ def pawn_moves(board: Board, frm: int) -> List[Move]:
             if on_board(behind):
                 bp = squares[behind]
                 if bp != EMPTY and piece_color(bp) != side and piece_type(bp) == PAWN:
-                    moves.append(Move(frm, ep, flags=FLAG_EN_PASSANT))
+                    out.append(encode_move(frm, ep, flags=FLAG_EN_PASSANT))
 
-    return moves
 
+def leaper_captures(
+    board: Board, frm: int, deltas: tuple[int, ...], out: array
+) -> None:
+    side = board.side_to_move
+    squares = board.squares
+    for d in deltas:
+        to = frm + d
+        if not on_board(to):
+            continue
+        dst = squares[to]
+        if dst != EMPTY and piece_color(dst) != side:
+            out.append(frm | (to << 7))
+
+
+def slider_captures(
+    board: Board, frm: int, deltas: tuple[int, ...], out: array
+) -> None:
+    side = board.side_to_move
+    squares = board.squares
+    for d in deltas:
+        to = frm + d
+        while on_board(to):
+            dst = squares[to]
+            if dst != EMPTY:
+                if piece_color(dst) != side:
+                    out.append(frm | (to << 7))
+                break
+            to += d
+
+
+def pawn_captures(board: Board, frm: int, out: array) -> None:
+    """Pawn captures, en passant, and pushes that promote."""
+    side = board.side_to_move
+    squares = board.squares
+
+    forward = _rank_dist if side == WHITE else -_rank_dist
+    last_rank = 7 if side == WHITE else 0
+
+    one = frm + forward
+    if (one >> 4) == last_rank and squares[one] == EMPTY:
+        _promotions_or_single(frm, one, last_rank, out)
+
+    for df in (-1, 1):
+        to = one + df
+        if not on_board(to):
+            continue
+        dst = squares[to]
+        if dst != EMPTY and piece_color(dst) != side:
+            _promotions_or_single(frm, to, last_rank, out)
+
+    ep = board.ep_square
+    if ep != -1 and (ep == one - 1 or ep == one + 1):
+        # same check as pawn_moves: there has to be an enemy pawn to take
+        bp = squares[ep - forward]
+        if bp != EMPTY and piece_color(bp) != side and piece_type(bp) == PAWN:
+            out.append(encode_move(frm, ep, flags=FLAG_EN_PASSANT))
+
+
+_PROMO_FLAGS = FLAG_PROMOTION << FLAGS_SHIFT
 
-def _promotions_or_single(
-    frm: int, to: int, last_rank: int, *, capture: bool = False
-) -> List[Move]:
-    to_rank = to >> 4
-    if to_rank == last_rank:
-        return [
-            Move(frm, to, promo=QUEEN, flags=FLAG_PROMOTION),
-            Move(frm, to, promo=ROOK, flags=FLAG_PROMOTION),
-            Move(frm, to, promo=BISHOP, flags=FLAG_PROMOTION),
-            Move(frm, to, promo=KNIGHT, flags=FLAG_PROMOTION),
-        ]
-    return [Move(frm, to)]
+
+def _promotions_or_single(frm: int, to: int, last_rank: int, out: array) -> None:
+    base = frm | (to << 7)
+    if (to >> 4) == last_rank:
+        out.append(base | (QUEEN << PROMO_SHIFT) | _PROMO_FLAGS)
+        out.append(base | (ROOK << PROMO_SHIFT) | _PROMO_FLAGS)
+        out.append(base | (BISHOP << PROMO_SHIFT) | _PROMO_FLAGS)
+        out.append(base | (KNIGHT << PROMO_SHIFT) | _PROMO_FLAGS)
+    else:
+        out.append(base)
 
 
-def castle_candidates(board: Board, king_from: int) -> List[Move]:
+def castle_candidates(board: Board, king_from: int, out: array) -> None:
     side = board.side_to_move
     rights = board.castling_rights
     squares = board.squares
-    moves: List[Move] = []
 
     # Squares
     e1, f1, g1, d1, c1, b1 = (
@@ -243,99 +467,78 @@ def castle_candidates(board: Board, king_from: int) -> List[Move]:
 
     if side == WHITE and king_from == e1:
         if (rights & WHITE_OO) and squares[f1] == EMPTY and squares[g1] == EMPTY:
-            moves.append(Move(e1, g1, flags=FLAG_CASTLE))
+            out.append(encode_move(e1, g1, flags=FLAG_CASTLE))
         if (
             (rights & WHITE_OOO)
             and squares[d1] == EMPTY
             and squares[c1] == EMPTY
             and squares[b1] == EMPTY
         ):
-            moves.append(Move(e1, c1, flags=FLAG_CASTLE))
+            out.append(encode_move(e1, c1, flags=FLAG_CASTLE))
 
     if side == BLACK and king_from == e8:
         if (rights & BLACK_OO) and squares[f8] == EMPTY and squares[g8] == EMPTY:
-            moves.append(Move(e8, g8, flags=FLAG_CASTLE))
+            out.append(encode_move(e8, g8, flags=FLAG_CASTLE))
         if (
             (rights & BLACK_OOO)
             and squares[d8] == EMPTY
             and squares[c8] == EMPTY
             and squares[b8] == EMPTY
         ):
-            moves.append(Move(e8, c8, flags=FLAG_CASTLE))
-
-    return moves
+            out.append(encode_move(e8, c8, flags=FLAG_CASTLE))
 
 
 def king_square(board: Board, color: int) -> int:
-    for idx in range(128):
-        if not on_board(idx):
-            continue
-        piece = board.squares[idx]
-        if piece != EMPTY and piece_color(piece) == color and piece_type(piece) == KING:
-            return idx
-    raise RuntimeError("King not found")
+    ksq = board.king_sq[color]
+    if ksq == -1:
+        raise RuntimeError("King not found")
+    return ksq
 
 
-def is_square_attacked(board: Board, sq: int, by_color: int) -> bool:
+def attackers_to(board: Board, sq: int, by_color: int) -> List[int]:
+    """Squares of every by_color piece attacking sq (same test as is_square_attacked)."""
     squares = board.squares
+    out: List[int] = []
+    for frm in board.piece_squares[by_color]:
+        bit = 1 << squares[frm]
+        diff = sq - frm + _DIFF
+        if not ATTACKS[diff] & bit:
+            continue
+        if bit & _SLIDERS:
+            d = RAY_STEP[diff]
+            s = frm + d
+            while s != sq and squares[s] == EMPTY:
+                s += d
+            if s != sq:
+                continue
+        out.append(frm)
+    return out
 
-    # Pawn
-    if by_color == WHITE:
-        for d in (-_rank_dist - 1, -_rank_dist + 1):  # sq - 17, sq - 15
-            frm = sq + d
-            if on_board(frm):
-                p = squares[frm]
-                if p and piece_color(p) == WHITE and piece_type(p) == PAWN:
-                    return True
-    else:
-        for d in (_rank_dist - 1, _rank_dist + 1):  # sq + 15, sq + 17
-            frm = sq + d
-            if on_board(frm):
-                p = squares[frm]
-                if p and piece_color(p) == BLACK and piece_type(p) == PAWN:
-                    return True
-
-    # Knight
-    for d in KNIGHT_DELTAS:
-        frm = sq - d
-        if on_board(frm):
-            p = squares[frm]
-            if p and piece_color(p) == by_color and piece_type(p) == KNIGHT:
-                return True
-
-    # King
-    for d in KING_DELTAS:
-        frm = sq - d
-        if on_board(frm):
-            p = squares[frm]
-            if p and piece_color(p) == by_color and piece_type(p) == KING:
-                return True
-
-    # Bishop/Queen
-    for d in BISHOP_DELTAS:
-        frm = sq + d
-        while on_board(frm):
-            p = squares[frm]
-            if p:
-                if piece_color(p) == by_color and (piece_type(p) in (BISHOP, QUEEN)):
-                    return True
-                break
-            frm += d
-
-    # Rock/Queen
-    for d in ROOK_DELTAS:
-        frm = sq + d
-        while on_board(frm):
-            p = squares[frm]
-            if p:
-                if piece_color(p) == by_color and (piece_type(p) in (ROOK, QUEEN)):
-                    return True
-                break
-            frm += d
 
+def is_square_attacked(board: Board, sq: int, by_color: int) -> bool:
+    """Goes over by_color's pieces and asks the difference tables whether each
+    one could reach sq. Only sliders that line up get a ray walked."""
+    squares = board.squares
+    for frm in board.piece_squares[by_color]:
+        # lifted pieces (see _legal_king_moves, see.py) read as EMPTY, bit 0
+        # is never set in ATTACKS
+        bit = 1 << squares[frm]
+        diff = sq - frm + _DIFF
+        if not ATTACKS[diff] & bit:
+            continue
+        if not bit & _SLIDERS:
+            return True
+        d = RAY_STEP[diff]
+        s = frm + d
+        while s != sq and squares[s] == EMPTY:
+            s += d
+        if s == sq:
+            return True
     return False
 
 
 def in_check(board: Board, color: int) -> bool:
-    ksq = king_square(board, color)
+    if isinstance(board, BitBoard):
+        return bitboard.in_check(board, color)
+    ksq = board.king_sq[color]
     return is_square_attacked(board, ksq, by_color=BLACK if color == WHITE else WHITE)
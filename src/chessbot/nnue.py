@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        "nnue needs numpy, install with: pip install chessbot[numpy]"
+    ) from e
+
+from .board import EMPTY, ROOK, Board, make_piece_idx, on_board, piece_color
+from .eval import evaluate
+
+# Small NNUE style evaluator.
+#
+# Inputs are 768 piece-square features (6 piece types x 2 colors x 64 squares),
+# one hidden layer with clipped relu, one output. The first layer's output (the
+# accumulator) is a sum of one weight row per piece on the board, so a move
+# only has to add / subtract the rows of the pieces it moved, captured or
+# promoted instead of redoing the whole layer. Everything is integer so the
+# incremental sum is exact, whatever order moves were made in.
+#
+# Score is White's POV in centipawns, same as eval.evaluate().
+
+N_FEATURES = 768
+QA = 255  # clipped relu ceiling for the hidden layer
+WEIGHTS_VERSION = 1
+
+
+def _feature(piece: int, sq: int) -> int:
+    color = piece >> 3
+    ptype = piece & 0b111
+    sq64 = (sq >> 4) * 8 + (sq & 7)
+    return ((color * 6 + ptype - 1) << 6) | sq64
+
+
+# feature index by [piece code][0x88 square], -1 for empty / off board
+FEATURE: List[List[int]] = [
+    [
+        _feature(p, sq) if (p & 0b111) and (p & 0b111) <= 6 and on_board(sq) else -1
+        for sq in range(128)
+    ]
+    for p in range(16)
+]
+
+
+@dataclass
+class NNUEWeights:
+    """Network parameters.
+
+    Stored as .npz with these arrays:
+      version  int, WEIGHTS_VERSION
+      w1       int16 (768, H)  feature -> hidden
+      b1       int32 (H,)
+      w2       int16 (H,)      hidden -> output
+      b2       int32 ()
+      scale    int32 ()        output is (clip(acc, 0, QA) . w2 + b2) // scale
+    """
+
+    w1: np.ndarray
+    b1: np.ndarray
+    w2: np.ndarray
+    b2: int
+    scale: int
+
+    @property
+    def hidden(self) -> int:
+        return self.w1.shape[1]
+
+
+def load_weights(path: str) -> NNUEWeights:
+    with np.load(path) as f:
+        version = int(f["version"])
+        if version != WEIGHTS_VERSION:
+            raise ValueError(f"{path}: weights version {version}, expected {WEIGHTS_VERSION}")
+        w = NNUEWeights(
+            w1=f["w1"].astype(np.int16),
+            b1=f["b1"].astype(np.int32),
+            w2=f["w2"].astype(np.int16),
+            b2=int(f["b2"]),
+            scale=int(f["scale"]),
+        )
+    h = w.hidden
+    if w.w1.shape != (N_FEATURES, h) or w.b1.shape != (h,) or w.w2.shape != (h,):
+        raise ValueError(f"{path}: bad layer shapes {w.w1.shape} {w.b1.shape} {w.w2.shape}")
+    if w.scale <= 0:
+        raise ValueError(f"{path}: scale must be positive")
+    return w
+
+
+def save_weights(path: str, w: NNUEWeights) -> None:
+    np.savez(
+        path,
+        version=np.int32(WEIGHTS_VERSION),
+        w1=w.w1.astype(np.int16),
+        b1=w.b1.astype(np.int32),
+        w2=w.w2.astype(np.int16),
+        b2=np.int32(w.b2),
+        scale=np.int32(w.scale),
+    )
+
+
+def random_weights(hidden: int = 64, seed: int = 0) -> NNUEWeights:
+    """Untrained network, for benchmarks and testing the plumbing."""
+    rng = np.random.default_rng(seed)
+    return NNUEWeights(
+        w1=rng.integers(-32, 33, size=(N_FEATURES, hidden), dtype=np.int16),
+        b1=rng.integers(0, QA // 2, size=hidden, dtype=np.int32),
+        w2=rng.integers(-64, 65, size=hidden, dtype=np.int16),
+        b2=0,
+        scale=64,
+    )
+
+
+class Accumulator:
+    """First layer output for a board, kept in step with its make/unmake.
+
+    Attaches itself to board.accumulator, the board then calls push() after
+    every move and pop() on every unmake. One entry per ply on a stack, so
+    unmake is just a pop.
+    """
+
+    def __init__(self, weights: NNUEWeights, board: Board) -> None:
+        self.weights = weights
+        self._w1 = weights.w1.astype(np.int32)
+        self._w2 = weights.w2.astype(np.int64)
+        self._stack: List[np.ndarray] = []
+        self.board = board
+        self.refresh(board)
+        board.accumulator = self
+
+    def detach(self) -> None:
+        if self.board.accumulator is self:
+            self.board.accumulator = None
+
+    def refresh(self, board: Board) -> None:
+        """Recompute from scratch and drop the stack."""
+        self._stack = [self.compute(board)]
+
+    def compute(self, board: Board) -> np.ndarray:
+        squares = board.squares
+        feats = [FEATURE[squares[sq]][sq] for side in (0, 1) for sq in board.piece_squares[side]]
+        return self.weights.b1 + self._w1[feats].sum(axis=0, dtype=np.int32)
+
+    def push(
+        self,
+        moved: int,
+        frm: int,
+        placed: int,
+        to: int,
+        captured: int,
+        captured_square: int,
+        rook_from: int,
+        rook_to: int,
+    ) -> None:
+        w1 = self._w1
+        acc = self._stack[-1] + w1[FEATURE[placed][to]] - w1[FEATURE[moved][frm]]
+        if captured != EMPTY:
+            acc -= w1[FEATURE[captured][captured_square]]
+        if rook_from != -1:
+            rook = make_piece_idx(piece_color(moved), ROOK)
+            acc += w1[FEATURE[rook][rook_to]] - w1[FEATURE[rook][rook_from]]
+        self._stack.append(acc)
+
+    def pop(self) -> None:
+        self._stack.pop()
+
+    def evaluate(self, board: Board | None = None) -> int:
+        """Network output for the current position. board is ignored, it's
+        there so this can stand in for eval.evaluate."""
+        hidden = np.clip(self._stack[-1], 0, QA)
+        return (int(hidden.dot(self._w2)) + self.weights.b2) // self.weights.scale
+
+
+def _random_lines(n_lines: int, plies: int, seed: int) -> List[List[int]]:
+    from .movegen import generate_legal_packed
+
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n_lines):
+        b = Board()
+        line = []
+        for _ in range(plies):
+            moves = generate_legal_packed(b)
+            if not moves:
+                break
+            m = rng.choice(moves)
+            b.make(m)
+            line.append(m)
+        lines.append(line)
+    return lines
+
+
+def _time_lines(board: Board, lines: List[List[int]], eval_fn) -> Tuple[int, float]:
+    evals = 0
+    start = time.perf_counter()
+    for line in lines:
+        for m in line:
+            board.make(m)
+            eval_fn(board)
+            evals += 1
+        for _ in line:
+            board.unmake()
+    return evals, time.perf_counter() - start
+
+
+def benchmark(
+    weights: NNUEWeights, *, lines: int = 50, plies: int = 60, seed: int = 1
+) -> List[Tuple[str, int, float]]:
+    """Evals/sec along random games, make/unmake included, as
+    (name, evals, seconds) for the classical eval, the incremental network
+    and the network recomputed from scratch every time."""
+    games = _random_lines(lines, plies, seed)
+    results = []
+
+    board = Board()
+    results.append(("classical", *_time_lines(board, games, evaluate)))
+
+    acc = Accumulator(weights, board)
+    results.append(("nnue", *_time_lines(board, games, acc.evaluate)))
+    acc.detach()
+
+    full = Accumulator(weights, Board())
+    full.detach()
+
+    def full_eval(b: Board) -> int:
+        full.refresh(b)
+        return full.evaluate(b)
+
+    results.append(("nnue (no accumulator)", *_time_lines(board, games, full_eval)))
+    return results
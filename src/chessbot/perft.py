@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from .board import Board
+from .move import Move
+from .movegen import generate_legal_packed
+
+# perft = count leaf nodes of the legal move tree. known counts for standard
+# positions are the easiest way to catch movegen bugs (and time it)
+
+
+class PerftCache:
+    """Fixed size cache of subtree counts keyed by (zobrist, depth). Overwrites on collision."""
+
+    def __init__(self, size_mb: int = 16) -> None:
+        # 8 byte key + 8 byte count + 1 byte depth per entry
+        n = 1
+        while n * 2 * 17 <= size_mb * 1024 * 1024:
+            n *= 2
+        self.mask = n - 1
+        self.keys = array("Q", bytes(8 * n))
+        self.counts = array("Q", bytes(8 * n))
+        self.depths = array("B", bytes(n))
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: int, depth: int) -> int:
+        """Return the cached count, or -1."""
+        i = key & self.mask
+        if self.depths[i] == depth and self.keys[i] == key:
+            self.hits += 1
+            return self.counts[i]
+        self.misses += 1
+        return -1
+
+    def put(self, key: int, depth: int, count: int) -> None:
+        i = key & self.mask
+        self.keys[i] = key
+        self.depths[i] = depth
+        self.counts[i] = count
+
+
+@dataclass
+class PerftResult:
+    depth: int
+    nodes: int
+    seconds: float
+    # per root move counts, only filled in by divide
+    divide: List[Tuple[Move, int]] = field(default_factory=list)
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.seconds) if self.seconds > 0 else 0
+
+
+def perft(board: Board, depth: int, cache: Optional[PerftCache] = None) -> int:
+    if depth == 0:
+        return 1
+    # bulk count, no need to make the last ply
+    if depth == 1:
+        return len(generate_legal_packed(board))
+
+    if cache is not None:
+        hit = cache.get(board.zobrist, depth)
+        if hit >= 0:
+            return hit
+
+    moves = generate_legal_packed(board)
+    nodes = 0
+    for m in moves:
+        board.make(m)
+        nodes += perft(board, depth - 1, cache)
+        board.unmake()
+
+    if cache is not None:
+        cache.put(board.zobrist, depth, nodes)
+    return nodes
+
+
+def divide(
+    board: Board, depth: int, cache: Optional[PerftCache] = None
+) -> List[Tuple[Move, int]]:
+    """Perft split by root move."""
+    out: List[Tuple[Move, int]] = []
+    for m in generate_legal_packed(board):
+        board.make(m)
+        out.append((Move.unpack(m), perft(board, depth - 1, cache)))
+        board.unmake()
+    return out
+
+
+def run_perft(
+    board: Board,
+    depth: int,
+    *,
+    split: bool = False,
+    cache: Optional[PerftCache] = None,
+) -> PerftResult:
+    """Timed perft (or divide when split is set)."""
+    t0 = time.perf_counter()
+    if split and depth > 0:
+        rows = divide(board, depth, cache)
+        nodes = sum(n for _, n in rows)
+    else:
+        rows = []
+        nodes = perft(board, depth, cache)
+    return PerftResult(depth, nodes, time.perf_counter() - t0, rows)
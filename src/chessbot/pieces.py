@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+# Piece codes and values, with no imports from the rest of the package so
+# board.py, pst.py and eval.py can all use them without an import cycle.
+# board.py re-exports the codes and helpers, import them from there.
+
+WHITE = 0
+BLACK = 1
+
+# (low 3 bits)
+EMPTY = 0
+PAWN = 1
+KNIGHT = 2
+BISHOP = 3
+ROOK = 4
+QUEEN = 5
+KING = 6
+
+PIECE_VALUE = {
+    PAWN: 100,
+    KNIGHT: 320,
+    BISHOP: 330,
+    ROOK: 500,
+    QUEEN: 900,
+    KING: 2000,
+}
+
+CENTER_FILES = {3, 4}
+CENTER_RANKS = {3, 4}
+
+
+def on_board(idx: int) -> bool:
+    return (idx & 0x88) == 0
+
+
+def make_piece_idx(color: int, ptype: int) -> int:
+    return (color << 3) | ptype
+
+
+def piece_type(piece: int) -> int:
+    return piece & 0b111
+
+
+def piece_color(piece: int) -> int:
+    return (piece >> 3) & 1
+
+
+def is_center(idx: int) -> bool:
+    return (idx & 7) in CENTER_FILES and (idx >> 4) in CENTER_RANKS
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import List
+
+from .pieces import (
+    BISHOP,
+    BLACK,
+    KNIGHT,
+    PIECE_VALUE,
+    QUEEN,
+    ROOK,
+    WHITE,
+    is_center,
+    make_piece_idx,
+    on_board,
+)
+
+# Piece-square tables: material plus the eval terms that only depend on where a
+# single piece stands, so Board can keep the sum up to date per move. Pawn-only
+# terms (pawn advance) live in eval's pawn hash instead.
+# Indexed [piece code][0x88 square], already signed from White's POV
+# (black entries are negative) so the board just adds them up.
+#
+# Midgame and endgame tables are tapered by game phase. They hold the same
+# terms for now, the split is there so endgame specific terms have a place.
+
+PHASE_WEIGHT = {KNIGHT: 1, BISHOP: 1, ROOK: 2, QUEEN: 4}  # sums to eval.MAX_PHASE
+
+# centre bonus per piece type
+_CENTER_BONUS = {KNIGHT: 10, BISHOP: 5, QUEEN: 3}
+
+
+def _square_value(ptype: int, idx: int) -> int:
+    val = PIECE_VALUE[ptype]
+    if ptype in _CENTER_BONUS and is_center(idx):
+        val += _CENTER_BONUS[ptype]
+    return val
+
+
+def _build() -> List[List[int]]:
+    table = [[0] * 128 for _ in range(16)]
+    for ptype in PIECE_VALUE:
+        for color in (WHITE, BLACK):
+            sign = 1 if color == WHITE else -1
+            row = table[make_piece_idx(color, ptype)]
+            for idx in range(128):
+                if on_board(idx):
+                    row[idx] = sign * _square_value(ptype, idx)
+    return table
+
+
+PST_MG = _build()
+PST_EG = _build()
+
+# phase contribution by piece code
+PHASE_BY_CODE = [PHASE_WEIGHT.get(p & 0b111, 0) if p else 0 for p in range(16)]
+
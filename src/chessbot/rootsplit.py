@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, wait
+from dataclasses import replace
+from typing import Callable, List, Optional, Tuple
+
+from .bitboard import BitBoard
+from .board import Board
+from .engine import (
+    INF,
+    IterationInfo,
+    SearchAborted,
+    SearchResult,
+    SearchStats,
+    _Search,
+)
+from .move import Move
+from .movegen import generate_legal_packed
+from .timeman import SearchLimits
+from .tt import BOUND_EXACT, TranspositionTable
+
+# Root splitting: the last iteration's root moves are farmed out to a process
+# pool. This process searches everything up to depth - 1 plus the first root
+# move at full depth, which gives alpha. Every other root move goes to a
+# worker with that alpha, gets a null window test against it and a full
+# re-search only if it beats it, same as PVS at the root.
+#
+# alpha is fixed for the whole split instead of raised as workers report, so
+# the result doesn't depend on which worker finishes first.
+
+# each task gets its own table, so results don't depend on which worker ran what
+TASK_TT_MB = 4
+# how often to look at the stop flag / deadline while waiting on workers
+POLL_SECONDS = 0.02
+
+# set in each worker by the pool initializer, RootSplitPool.stop
+_worker_stop = None
+
+
+def _init_worker(stop) -> None:
+    global _worker_stop
+    _worker_stop = stop
+
+
+class RootSplitPool:
+    """A process pool kept across select_move calls (starting one is slow).
+
+    stop is shared with every worker, running root move searches poll it
+    like any other search's stop flag.
+    """
+
+    def __init__(self, workers: int, task_tt_mb: int = TASK_TT_MB) -> None:
+        self.workers = workers
+        self.task_tt_mb = task_tt_mb
+        # spawn, same as smp.py: forking a threaded process can hang the child
+        ctx = mp.get_context("spawn")
+        self.stop = ctx.Event()
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self.stop,),
+        )
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    def __enter__(self) -> "RootSplitPool":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def search_root_split(
+    board: Board,
+    tt: TranspositionTable,
+    limits: SearchLimits,
+    pool: RootSplitPool,
+    *,
+    on_iteration: Optional[Callable[[IterationInfo], None]] = None,
+    start: Optional[float] = None,
+) -> SearchResult:
+    """Fixed depth search with the last iteration split over pool. A stop
+    flag or deadline in limits still works, giving the best move so far.
+    The stats add up every worker's counters."""
+    if limits.depth is None or limits.is_timed() or limits.nodes is not None:
+        raise ValueError("root split only does fixed depth searches")
+    depth = limits.depth
+    pool.stop.clear()
+
+    main = _Search(
+        board,
+        tt,
+        replace(limits, depth=max(1, depth - 1)),
+        on_iteration=on_iteration,
+        start=start,
+    )
+    pv_move = main.run().pack()
+    if depth < 2 or main.completed_depth < depth - 1:
+        return main.result(Move.unpack(pv_move))
+
+    ordered = main._order(generate_legal_packed(board), pv_move, 0, 0)
+    first = ordered[0]
+    root_ply = board.ply
+    board.make(first)
+    try:
+        alpha = main._pvs(True, depth - 1, -INF, INF, ply=1, move=first)
+    except SearchAborted:
+        main.unwind(root_ply)
+        return main.result(Move.unpack(pv_move))
+    board.unmake()
+
+    blob = board.to_bytes()
+    backend = type(board) is BitBoard
+    # monotonic clocks aren't comparable between processes, send wall time
+    wall_deadline = None
+    if limits.deadline is not None:
+        wall_deadline = time.time() + (limits.deadline - time.monotonic())
+    futures = [
+        pool.executor.submit(
+            _search_root_move,
+            blob,
+            backend,
+            m,
+            depth,
+            alpha,
+            pool.task_tt_mb,
+            wall_deadline,
+        )
+        for m in ordered[1:]
+    ]
+
+    workers = SearchStats()
+    best_move, best_score = first, alpha
+    stopped = False
+    # in move order, so ties go to the earlier move like in _root
+    for f in futures:
+        while not stopped:
+            try:
+                m, score, stats = f.result(timeout=POLL_SECONDS)
+                break
+            except TimeoutError:
+                stopped = main.time.should_stop()
+        if stopped:
+            break
+        workers.add(stats)
+        if score is None:
+            # the worker ran into the deadline first
+            stopped = True
+            break
+        if score > best_score:
+            best_move, best_score = m, score
+
+    if stopped:
+        pool.stop.set()
+        for g in futures:
+            g.cancel()
+        # running tasks notice the flag within a few hundred nodes, wait for
+        # them so the pool is free for the next search
+        wait(futures)
+        # the unfinished split isn't an iteration, keep depth - 1's
+        result = main.result(Move.unpack(pv_move))
+        result.stats.add(workers)
+        return result
+
+    tt.store(board.zobrist, best_score, depth, BOUND_EXACT, best_move)
+    info = IterationInfo(
+        depth,
+        best_score,
+        main.nodes + workers.nodes,
+        main.time.elapsed(),
+        main.pv(depth),
+        max(main.seldepth, workers.seldepth),
+    )
+    main.iterations.append(info)
+    if on_iteration is not None:
+        on_iteration(info)
+    result = SearchResult(
+        Move.unpack(best_move), best_score, depth, info.pv, main.stats(), main.iterations
+    )
+    result.stats.add(workers)
+    return result
+
+
+def _search_root_move(
+    blob: bytes,
+    bitboard: bool,
+    m: int,
+    depth: int,
+    alpha: int,
+    tt_mb: int,
+    wall_deadline: Optional[float],
+) -> Tuple[int, Optional[int], SearchStats]:
+    """Score one root move to depth (from the root's side), given alpha.
+    The score is None if the pool's stop flag or the deadline cut it short."""
+    board = (BitBoard if bitboard else Board).from_bytes(blob)
+    board.make(m)
+    deadline = None
+    if wall_deadline is not None:
+        deadline = time.monotonic() + (wall_deadline - time.time())
+    limits = SearchLimits(depth=depth, stop=_worker_stop, deadline=deadline)
+    # no iterative deepening here: full window warm-up searches cost far more
+    # than the better ordering saves under a null window
+    s = _Search(board, TranspositionTable(tt_mb), limits)
+    try:
+        score = -s._negamax(depth - 1, -alpha - 1, -alpha, ply=1, prev_move=m)
+        if score > alpha:
+            score = -s._negamax(depth - 1, -INF, -alpha, ply=1, prev_move=m)
+    except SearchAborted:
+        return m, None, s.stats()
+    return m, score, s.stats()
+
+
+def benchmark(
+    board: Board, depth: int, worker_counts: List[int]
+) -> List[Tuple[int, Move, float]]:
+    """(workers, move, seconds) per worker count, 0 = the normal single process
+    search. Pool start-up isn't timed."""
+    from .engine import DEFAULT_TT_MB, select_move
+
+    out = []
+    limits = SearchLimits(depth=depth)
+    for n in worker_counts:
+        tt = TranspositionTable(DEFAULT_TT_MB)
+        if n == 0:
+            start = time.perf_counter()
+            m = select_move(board, tt=tt, limits=limits)
+        else:
+            with RootSplitPool(n) as pool:
+                # let every worker start before timing
+                list(pool.executor.map(abs, range(n)))
+                start = time.perf_counter()
+                m = select_move(board, tt=tt, limits=limits, root_split=pool)
+        out.append((n, m, time.perf_counter() - start))
+    return out
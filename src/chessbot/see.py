@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import List
+
+from .board import EMPTY, PAWN, WHITE, Board
+from .eval import PIECE_VALUE, PIECE_VALUE_BY_CODE
+from .move import FLAG_EN_PASSANT, FLAGS_SHIFT, PROMO_SHIFT
+from .movegen import attackers_to
+
+_VALUE_OF = PIECE_VALUE_BY_CODE
+
+
+def see(board: Board, m: int) -> int:
+    """Static exchange evaluation of a packed move: material the side to move
+    ends up with if both sides keep recapturing on the destination square with
+    their cheapest piece, and either side may stop when it's ahead.
+
+    Pieces are lifted off the board as they capture, so x-ray attackers behind
+    them are found by the next attackers_to scan. Pins are ignored.
+    """
+    squares = board.squares
+    frm = m & 0x7F
+    to = (m >> 7) & 0x7F
+    promo = (m >> PROMO_SHIFT) & 0x7
+    side = board.side_to_move
+
+    lifted: List[tuple[int, int]] = [(frm, squares[frm])]
+    if (m >> FLAGS_SHIFT) & FLAG_EN_PASSANT:
+        behind = to - 16 if side == WHITE else to + 16
+        lifted.append((behind, squares[behind]))
+        gain = [PIECE_VALUE[PAWN]]
+    else:
+        gain = [_VALUE_OF[squares[to]]]
+
+    # value of whatever now sits on 'to' and can be taken next
+    on_square = _VALUE_OF[squares[frm]]
+    if promo:
+        gain[0] += PIECE_VALUE[promo] - PIECE_VALUE[PAWN]
+        on_square = PIECE_VALUE[promo]
+
+    for sq, _ in lifted:
+        squares[sq] = EMPTY
+    color = side ^ 1
+    try:
+        while True:
+            attackers = attackers_to(board, to, color)
+            if not attackers:
+                break
+            att = min(attackers, key=lambda sq: _VALUE_OF[squares[sq]])
+            # score if this capture happens, from the capturing side's view
+            gain.append(on_square - gain[-1])
+            # neither side can do better by continuing, drop the speculative entry
+            if max(-gain[-2], gain[-1]) < 0:
+                gain.pop()
+                break
+            on_square = _VALUE_OF[squares[att]]
+            lifted.append((att, squares[att]))
+            squares[att] = EMPTY
+            color ^= 1
+    finally:
+        for sq, p in lifted:
+            squares[sq] = p
+
+    # each side only takes if it beats stopping
+    while len(gain) > 1:
+        last = gain.pop()
+        gain[-1] = -max(-gain[-1], last)
+    return gain[0]
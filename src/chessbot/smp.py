@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import queue
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Callable, Optional
+
+from .bitboard import BitBoard
+from .board import Board
+from .engine import IterationInfo, SearchResult, _Search
+from .eval import evaluate
+from .movegen import generate_legal_packed
+from .timeman import SearchLimits
+from .tt import TranspositionTable
+
+if TYPE_CHECKING:
+    from .nnue import NNUEWeights
+
+# Lazy SMP: every process searches the same root with its own killers /
+# history, and they only cooperate through a transposition table in shared
+# memory. Helpers start at different depths so they don't all walk the same
+# tree in lockstep. Whoever finishes the deepest iteration wins.
+#
+# Starting processes and setting up the shared table is slow, so SmpPool
+# does it once and keeps both across searches. The pool's table is the
+# engine's table, there's nothing to copy in or out per search.
+
+# how long to wait for a helper to notice the stop flag and report
+HELPER_JOIN_SECONDS = 5.0
+# how long a new helper gets to start up (spawn re-imports everything)
+HELPER_START_SECONDS = 30.0
+
+
+class SmpPool:
+    """threads - 1 helper processes plus a transposition table in shared
+    memory, kept across select_move calls. Use .tt as the engine's table."""
+
+    def __init__(self, threads: int, size_mb: int) -> None:
+        if threads < 2:
+            raise ValueError("SmpPool needs at least 2 threads")
+        self.threads = threads
+        self.size_mb = size_mb
+        self._shm = SharedMemory(
+            create=True, size=TranspositionTable.buffer_bytes(size_mb)
+        )
+        self.tt = TranspositionTable(size_mb, self._shm.buf)
+        # spawn, not fork: forking while another thread (e.g. the UCI stdin
+        # reader) holds a lock can hang the child
+        self._ctx = mp.get_context("spawn")
+        # id of the current search, bumped when it ends. a helper's search is
+        # over as soon as this isn't the id it was given (see _SearchStop)
+        self._search_id = self._ctx.RawValue("q", 0)
+        self._helpers: list = []
+        self._jobs: list = []
+        try:
+            self._start_helpers()
+        except BaseException:
+            self.close()
+            raise
+
+    def _start_helpers(self) -> None:
+        """Start every helper and wait until they're all listening."""
+        # a fresh queue, so nothing a dead helper left behind gets read
+        self._results = self._ctx.Queue()
+        self._jobs = [self._ctx.Queue() for _ in range(self.threads - 1)]
+        self._helpers = [
+            self._ctx.Process(
+                target=_helper,
+                args=(self._shm.name, self.size_mb, jobs, self._results, self._search_id),
+                daemon=True,
+            )
+            for jobs in self._jobs
+        ]
+        for p in self._helpers:
+            p.start()
+        for _ in self._helpers:
+            self._results.get(timeout=HELPER_START_SECONDS)
+
+    def _restart_helpers(self) -> None:
+        for p in self._helpers:
+            p.terminate()
+        self._start_helpers()
+
+    def close(self) -> None:
+        self._search_id.value += 1
+        for jobs in self._jobs:
+            if jobs is not None:
+                jobs.put(None)
+        for p in self._helpers:
+            if p is not None:
+                p.join(HELPER_JOIN_SECONDS)
+                if p.is_alive():
+                    p.terminate()
+        self._helpers = []
+        self._jobs = []
+        if self._shm is not None:
+            self.tt.release()
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "SmpPool":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def search_smp(
+    board: Board,
+    limits: SearchLimits,
+    pool: SmpPool,
+    *,
+    nnue: Optional[NNUEWeights] = None,
+    on_iteration: Optional[Callable[[IterationInfo], None]] = None,
+    start: Optional[float] = None,
+) -> SearchResult:
+    """Search on pool.tt with this process plus the pool's helpers.
+
+    on_iteration only hears about this process's iterations, the stats
+    add up every process's counters.
+    """
+    tt = pool.tt
+    if not generate_legal_packed(board):
+        # let the normal search raise the mate / stalemate error
+        _Search(board, tt, limits).run()
+
+    tt.new_search()
+    search_id = pool._search_id.value
+    blob = board.to_bytes()
+    backend = type(board) is BitBoard
+    # helpers go one past the main depth, the stop flag ends them anyway
+    depth = limits.depth + 1 if limits.depth else None
+    for i, jobs in enumerate(pool._jobs):
+        jobs.put((search_id, blob, backend, depth, tt.age, (i + 1) % 2, nnue))
+
+    try:
+        main = _run(board, tt, limits, nnue, on_iteration=on_iteration, start=start)
+    finally:
+        pool._search_id.value = search_id + 1
+    result = main.result(main.best)
+    reported = 0
+    for _ in pool._helpers:
+        try:
+            h_depth, score, move, stats = pool._results.get(timeout=HELPER_JOIN_SECONDS)
+        except queue.Empty:
+            break
+        reported += 1
+        result.stats.add(stats)
+        # strictly deeper, so ties go to the main process
+        if h_depth > result.depth:
+            result.move, result.score, result.depth = move, score, h_depth
+            # main's pv is for another move, a helper's line isn't sent back
+            result.pv = [move]
+    if reported < len(pool._helpers):
+        # a helper is stuck or dead, and a late report would be taken for the
+        # next search's. start over with fresh ones
+        pool._restart_helpers()
+    return result
+
+
+def _run(
+    board: Board,
+    tt: TranspositionTable,
+    limits: SearchLimits,
+    nnue: Optional[NNUEWeights],
+    **kwargs,
+) -> _Search:
+    """Run one search, returns it with .best set to the move it found."""
+    acc = None
+    fn = evaluate
+    if nnue is not None:
+        from .nnue import Accumulator
+
+        acc = Accumulator(nnue, board)
+        fn = acc.evaluate
+    try:
+        search = _Search(board, tt, limits, fn, **kwargs)
+        search.best = search.run()
+    finally:
+        if acc is not None:
+            acc.detach()
+    return search
+
+
+class _SearchStop:
+    """Stop flag for one search id, set once the pool has moved past it."""
+
+    def __init__(self, current, search_id: int) -> None:
+        self.current = current
+        self.search_id = search_id
+
+    def is_set(self) -> bool:
+        return self.current.value != self.search_id
+
+
+def _helper(shm_name: str, size_mb: int, jobs, results, current_id) -> None:
+    """Helper process: search every job it's given until it gets None."""
+    shm = SharedMemory(name=shm_name)
+    tt = TranspositionTable(size_mb, shm.buf)
+    try:
+        results.put(None)  # started
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            search_id, blob, bitboard, depth, age, depth_offset, nnue = job
+            board = (BitBoard if bitboard else Board).from_bytes(blob)
+            tt.age = age
+            stop = _SearchStop(current_id, search_id)
+            limits = SearchLimits(depth=depth, infinite=True, stop=stop)
+            search = _run(board, tt, limits, nnue, depth_offset=depth_offset)
+            results.put(
+                (search.completed_depth, search.best_score, search.best, search.stats())
+            )
+    finally:
+        tt.release()
+        shm.close()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Optional, Protocol, Union
+
+from .board import WHITE
+
+# assume this many moves left when the clock has no movestogo
+DEFAULT_MOVES_TO_GO = 30
+# ms kept back per move for process/GUI lag
+MOVE_OVERHEAD_MS = 30
+
+
+class StopFlag(Protocol):
+    """threading.Event, multiprocessing.Event or anything else with is_set()."""
+
+    def is_set(self) -> bool: ...
+
+
+class StopValue(Protocol):
+    """multiprocessing.Value or anything else with a .value, nonzero = stop."""
+
+    value: int
+
+
+def stop_requested(stop: Union[StopFlag, StopValue, None]) -> bool:
+    if stop is None:
+        return False
+    is_set = getattr(stop, "is_set", None)
+    return is_set() if is_set is not None else bool(stop.value)
+
+
+@dataclass
+class SearchLimits:
+    """What bounds a search. Anything left as None is unlimited.
+
+    Times are in milliseconds, like UCI's go command. stop can be set from
+    another thread / process to end the search early, deadline is a
+    time.monotonic() value it must not run past. Either way select_move
+    still returns the best move it has.
+    """
+
+    depth: Optional[int] = None
+    movetime: Optional[int] = None
+    wtime: Optional[int] = None
+    btime: Optional[int] = None
+    winc: int = 0
+    binc: int = 0
+    movestogo: Optional[int] = None
+    nodes: Optional[int] = None
+    infinite: bool = False
+    stop: Union[StopFlag, StopValue, None] = None
+    deadline: Optional[float] = None
+
+    def is_timed(self) -> bool:
+        return self.movetime is not None or self.wtime is not None or self.btime is not None
+
+
+class TimeManager:
+    """Turns SearchLimits into a soft limit (don't start another iteration) and a
+    hard limit (abort the current one)."""
+
+    def __init__(
+        self, limits: SearchLimits, side: int, start: Optional[float] = None
+    ) -> None:
+        self.limits = limits
+        # perf_counter() when the search was asked for, so setup counts too
+        self.start = time.perf_counter() if start is None else start
+        self.soft: Optional[float] = None  # seconds
+        self.hard: Optional[float] = None
+
+        if limits.infinite:
+            return
+        if limits.movetime is not None:
+            budget = max(1, limits.movetime - MOVE_OVERHEAD_MS) / 1000
+            self.soft = self.hard = budget
+            return
+
+        left = limits.wtime if side == WHITE else limits.btime
+        if left is None:
+            return
+        inc = limits.winc if side == WHITE else limits.binc
+        to_go = limits.movestogo or DEFAULT_MOVES_TO_GO
+        left = max(1, left - MOVE_OVERHEAD_MS)
+        target = left / to_go + inc * 0.75
+        # never plan to use more than half the clock on one move
+        self.soft = min(target, left * 0.5) / 1000
+        self.hard = min(target * 3, left * 0.5) / 1000
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def out_of_time(self) -> bool:
+        if self.limits.deadline is not None and time.monotonic() >= self.limits.deadline:
+            return True
+        return self.hard is not None and self.elapsed() >= self.hard
+
+    def should_stop(self) -> bool:
+        """Abort now: out of time or told to stop."""
+        return self.out_of_time() or stop_requested(self.limits.stop)
+
+    def can_start_iteration(self) -> bool:
+        # the next iteration usually costs a few times the last one, so don't
+        # start it past the soft limit
+        if self.should_stop():
+            return False
+        return self.soft is None or self.elapsed() < self.soft
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from array import array
+from typing import Optional, Tuple, Union
+
+# bound types
+BOUND_EXACT = 1
+BOUND_LOWER = 2  # score is at least this (failed high)
+BOUND_UPPER = 3  # score is at most this (failed low)
+
+# each entry is two 64 bit words: the full key xor the data word, and a packed
+# data word. the xor means an entry torn by another process writing at the same
+# time (lazy smp, shared buffer) just fails the key check instead of returning
+# another position's data
+ENTRY_BYTES = 16
+BUCKET_SIZE = 2  # slot 0 = depth preferred, slot 1 = always replace
+
+# data word layout (low to high bits)
+#   move  24 bits (packed, see move.encode_move)
+#   depth  8 bits
+#   bound  2 bits
+#   age    6 bits
+#   score 24 bits, stored with an offset so it's never negative
+_MOVE_BITS = 24
+_DEPTH_SHIFT = 24
+_BOUND_SHIFT = 32
+_AGE_SHIFT = 34
+_SCORE_SHIFT = 40
+_SCORE_OFFSET = 1 << 23
+
+_MOVE_MASK = (1 << _MOVE_BITS) - 1
+
+
+class TranspositionTable:
+    """Fixed size hash table of search results, keyed by Board.zobrist.
+
+    Normally owns its arrays. Pass buffer (anything memoryview can wrap, e.g.
+    SharedMemory.buf, at least buffer_bytes(size_mb) long) to keep the table
+    there instead, so several processes can share it.
+    """
+
+    def __init__(self, size_mb: int = 16, buffer: Union[memoryview, bytearray, None] = None) -> None:
+        n = self.entries_for(size_mb)
+        self.size_mb = size_mb
+        self.mask = n // BUCKET_SIZE - 1
+        self.shared = buffer is not None
+        if buffer is None:
+            self.keys = array("Q", bytes(8 * n))
+            self.data = array("Q", bytes(8 * n))
+        else:
+            self._view = memoryview(buffer)[: ENTRY_BYTES * n]
+            words = self._view.cast("Q")
+            self.keys = words[:n]
+            self.data = words[n:]
+        self.age = 0
+
+        # stats
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0  # stores that overwrote a different position
+
+    @staticmethod
+    def entries_for(size_mb: int) -> int:
+        n_entries = max(BUCKET_SIZE, (size_mb * 1024 * 1024) // ENTRY_BYTES)
+        # round bucket count down to a power of two so indexing is a mask
+        n_buckets = 1
+        while n_buckets * 2 * BUCKET_SIZE <= n_entries:
+            n_buckets *= 2
+        return n_buckets * BUCKET_SIZE
+
+    @classmethod
+    def buffer_bytes(cls, size_mb: int) -> int:
+        """Size of the external buffer a table of size_mb needs."""
+        return ENTRY_BYTES * cls.entries_for(size_mb)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def clear(self) -> None:
+        n = len(self.keys)
+        if self.shared:
+            zeros = array("Q", bytes(8 * n))
+            self.keys[:] = zeros
+            self.data[:] = zeros
+        else:
+            self.keys = array("Q", bytes(8 * n))
+            self.data = array("Q", bytes(8 * n))
+        self.age = 0
+        self.reset_stats()
+
+    def release(self) -> None:
+        """Drop the views into an external buffer so its owner can close it."""
+        if self.shared:
+            self.keys.release()
+            self.data.release()
+            self._view.release()
+
+    def reset_stats(self) -> None:
+        self.probes = self.hits = self.stores = self.collisions = 0
+
+    def new_search(self) -> None:
+        """Bump the age so entries from older searches get replaced first."""
+        self.age = (self.age + 1) & 0x3F
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int]]:
+        """Return (score, depth, bound, packed move) or None."""
+        self.probes += 1
+        i = (key & self.mask) * BUCKET_SIZE
+        keys = self.keys
+        data = self.data
+        d = data[i]
+        if keys[i] ^ d != key:
+            d = data[i + 1]
+            if keys[i + 1] ^ d != key:
+                return None
+        if d == 0:
+            return None
+        self.hits += 1
+        return (
+            (d >> _SCORE_SHIFT) - _SCORE_OFFSET,
+            (d >> _DEPTH_SHIFT) & 0xFF,
+            (d >> _BOUND_SHIFT) & 0x3,
+            d & _MOVE_MASK,
+        )
+
+    def store(self, key: int, score: int, depth: int, bound: int, move: int) -> None:
+        i = (key & self.mask) * BUCKET_SIZE
+        keys = self.keys
+        data = self.data
+        depth = max(0, min(depth, 0xFF))
+
+        # depth preferred slot: take it if empty, same position, stale, or we searched deeper
+        d0 = data[i]
+        same = keys[i] ^ d0 == key
+        if (
+            d0 == 0
+            or same
+            or ((d0 >> _AGE_SHIFT) & 0x3F) != self.age
+            or depth >= (d0 >> _DEPTH_SHIFT) & 0xFF
+        ):
+            slot = i
+            # keep the old best move if this result didn't find one
+            if same and move == 0:
+                move = d0 & _MOVE_MASK
+        else:
+            slot = i + 1
+
+        old = data[slot]
+        if old != 0 and keys[slot] ^ old != key:
+            self.collisions += 1
+        self.stores += 1
+        d = (
+            (move & _MOVE_MASK)
+            | (depth << _DEPTH_SHIFT)
+            | (bound << _BOUND_SHIFT)
+            | (self.age << _AGE_SHIFT)
+            | ((score + _SCORE_OFFSET) << _SCORE_SHIFT)
+        )
+        keys[slot] = key ^ d
+        data[slot] = d
+
+    def hashfull(self) -> int:
+        """Permille of the first 1000 slots in use (same idea as UCI hashfull)."""
+        sample = min(1000, len(self.data))
+        used = sum(1 for d in self.data[:sample] if d != 0)
+        return used * 1000 // sample
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import queue
+import sys
+import threading
+from typing import List, Optional, TextIO
+
+from .bitboard import BitBoard
+from .board import Board
+from .engine import (
+    DEFAULT_TT_MB,
+    MATE_SCORE,
+    MAX_PLY,
+    IterationInfo,
+    select_move,
+)
+from .move import Move
+from .movegen import generate_legal
+from .smp import SmpPool
+from .timeman import SearchLimits
+from .tt import TranspositionTable
+
+# UCI front-end. A reader thread puts stdin lines on a queue, the main loop
+# runs the commands, and go starts the search on its own thread, so stop /
+# isready / quit get answered while it thinks. Anything that changes engine
+# state (position, setoption, ucinewgame, go) stops a running search first,
+# a GUI is supposed to wait for bestmove anyway and blocking on a go infinite
+# would leave nothing able to end it.
+
+ENGINE_NAME = "chessbot"
+ENGINE_AUTHOR = "paw-chess"
+
+MAX_HASH_MB = 1024
+MAX_THREADS = 64
+
+_GO_INT_ARGS = ("depth", "movetime", "wtime", "btime", "winc", "binc", "movestogo", "nodes")
+
+
+def score_to_uci(score: int) -> str:
+    """'cp 35' or 'mate 3' / 'mate -2' (in moves, not plies)."""
+    if abs(score) >= MATE_SCORE - MAX_PLY:
+        moves = (MATE_SCORE - abs(score) + 1) // 2
+        return f"mate {moves if score > 0 else -moves}"
+    return f"cp {score}"
+
+
+def parse_go(tokens: List[str]) -> SearchLimits:
+    """SearchLimits for the words after 'go'. Unknown words are skipped."""
+    limits = SearchLimits()
+    i = 0
+    while i < len(tokens):
+        word = tokens[i]
+        if word in _GO_INT_ARGS and i + 1 < len(tokens):
+            setattr(limits, word, int(tokens[i + 1]))
+            i += 2
+            continue
+        if word == "infinite":
+            limits.infinite = True
+        i += 1
+    return limits
+
+
+def parse_position(tokens: List[str], bitboard: bool = False) -> Board:
+    """Board for the words after 'position': startpos|fen <fen> [moves ...]."""
+    cls = BitBoard if bitboard else Board
+    if "moves" in tokens:
+        split = tokens.index("moves")
+        setup, moves = tokens[:split], tokens[split + 1 :]
+    else:
+        setup, moves = tokens, []
+    if setup[:1] == ["startpos"]:
+        board = cls()
+    elif setup[:1] == ["fen"]:
+        board = cls.from_fen(" ".join(setup[1:]))
+    else:
+        raise ValueError("expected startpos or fen")
+
+    for text in moves:
+        mv = Move.from_uci(text)
+        legal = {(m.frm, m.to, m.promo) for m in generate_legal(board)}
+        if (mv.frm, mv.to, mv.promo) not in legal:
+            raise ValueError(f"illegal move {text}")
+        board.make_move(mv.frm, mv.to, mv.promo or None)
+    return board
+
+
+class UciEngine:
+    def __init__(
+        self,
+        out: TextIO = sys.stdout,
+        *,
+        hash_mb: int = DEFAULT_TT_MB,
+        threads: int = 1,
+        bitboard: bool = False,
+    ) -> None:
+        self.out = out
+        self._out_lock = threading.Lock()
+        self.bitboard = bitboard
+        # None after a bad position command, go refuses to search until the
+        # next good one rather than play a move for the wrong position
+        self.board: Optional[Board] = BitBoard() if bitboard else Board()
+        self.hash_mb = hash_mb
+        self.threads = threads
+        self.smp: Optional[SmpPool] = None
+        self._configure()
+
+        self._stop = threading.Event()
+        # set by stop / quit, lets go infinite print its bestmove
+        self._release = threading.Event()
+        self._search: Optional[threading.Thread] = None
+
+    def send(self, line: str) -> None:
+        with self._out_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def run(self, inp: TextIO = sys.stdin) -> int:
+        lines: "queue.Queue[Optional[str]]" = queue.Queue()
+
+        def reader() -> None:
+            for line in inp:
+                lines.put(line)
+            lines.put(None)
+
+        threading.Thread(target=reader, daemon=True).start()
+        while True:
+            line = lines.get()
+            if line is None or not self.handle(line):
+                break
+        self.stop_search()
+        if self.smp is not None:
+            self.smp.close()
+        return 0
+
+    def handle(self, line: str) -> bool:
+        """Run one command, False once it's time to quit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        cmd, args = tokens[0], tokens[1:]
+
+        if cmd == "quit":
+            return False
+        if cmd == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(
+                f"option name Hash type spin default {DEFAULT_TT_MB} min 1 max {MAX_HASH_MB}"
+            )
+            self.send(f"option name Threads type spin default 1 min 1 max {MAX_THREADS}")
+            self.send("uciok")
+        elif cmd == "isready":
+            self.send("readyok")
+        elif cmd == "stop":
+            self.stop_search()
+        elif cmd == "ucinewgame":
+            self.stop_search()
+            self.tt.clear()
+        elif cmd == "setoption":
+            self.stop_search()
+            self._setoption(args)
+        elif cmd == "position":
+            self.stop_search()
+            try:
+                self.board = parse_position(args, self.bitboard)
+            except ValueError as e:
+                self.board = None
+                self.send(f"info string bad position: {e}")
+        elif cmd == "go":
+            self.stop_search()
+            try:
+                limits = parse_go(args)
+            except ValueError as e:
+                self.send(f"info string bad go: {e}")
+                return True
+            if self.board is None:
+                self.send("info string no valid position, send position first")
+                self.send("bestmove 0000")
+                return True
+            self._start_search(limits)
+        else:
+            self.send(f"info string unknown command: {cmd}")
+        return True
+
+    def _setoption(self, args: List[str]) -> None:
+        # setoption name <name> value <value>, names can have spaces
+        if "name" not in args:
+            return
+        rest = args[args.index("name") + 1 :]
+        if "value" in rest:
+            split = rest.index("value")
+            name, value = " ".join(rest[:split]), " ".join(rest[split + 1 :])
+        else:
+            name, value = " ".join(rest), ""
+        name = name.lower()
+        try:
+            if name == "hash":
+                self.hash_mb = min(max(1, int(value)), MAX_HASH_MB)
+            elif name == "threads":
+                self.threads = min(max(1, int(value)), MAX_THREADS)
+            else:
+                self.send(f"info string unknown option: {name}")
+                return
+        except ValueError:
+            self.send(f"info string bad value for {name}: {value}")
+            return
+        self._configure()
+
+    def _configure(self) -> None:
+        """(Re)build the table, and the smp pool when Threads > 1, for the
+        current options. Done here so go doesn't pay for it."""
+        if self.smp is not None:
+            self.smp.close()
+            self.smp = None
+        if self.threads > 1:
+            self.smp = SmpPool(self.threads, self.hash_mb)
+            self.tt = self.smp.tt
+        else:
+            self.tt = TranspositionTable(self.hash_mb)
+
+    def _start_search(self, limits: SearchLimits) -> None:
+        self._stop = threading.Event()
+        self._release = threading.Event()
+        limits.stop = self._stop
+        board = self.board.copy()
+        self._search = threading.Thread(
+            target=self._think, args=(board, limits), daemon=True
+        )
+        self._search.start()
+
+    def stop_search(self) -> None:
+        """Stop the running search (if any) and wait for its bestmove."""
+        self._stop.set()
+        self._release.set()
+        self.wait_search()
+
+    def wait_search(self) -> None:
+        if self._search is not None:
+            self._search.join()
+            self._search = None
+
+    def _think(self, board: Board, limits: SearchLimits) -> None:
+        if not generate_legal(board):
+            # mated / stalemated, there's no move to give
+            self._wait_if_infinite(limits)
+            self.send("bestmove 0000")
+            return
+        move = select_move(
+            board,
+            tt=self.tt,
+            limits=limits,
+            smp=self.smp,
+            on_iteration=self._info,
+        )
+        self._wait_if_infinite(limits)
+        self.send(f"bestmove {move.to_uci()}")
+
+    def _wait_if_infinite(self, limits: SearchLimits) -> None:
+        # uci: no bestmove during go infinite until the gui says stop
+        if limits.infinite:
+            self._release.wait()
+
+    def _info(self, it: IterationInfo) -> None:
+        ms = int(it.seconds * 1000)
+        nps = int(it.nodes / it.seconds) if it.seconds > 0 else 0
+        line = (
+            f"info depth {it.depth} seldepth {it.seldepth} score {score_to_uci(it.score)} "
+            f"nodes {it.nodes} nps {nps} hashfull {self.tt.hashfull()} time {ms}"
+        )
+        if it.pv:
+            line += " pv " + " ".join(m.to_uci() for m in it.pv)
+        self.send(line)
+
+
+def main(
+    *, hash_mb: int = DEFAULT_TT_MB, threads: int = 1, bitboard: bool = False
+) -> int:
+    return UciEngine(hash_mb=hash_mb, threads=threads, bitboard=bitboard).run()